@@ -8,23 +8,48 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 
 from custom_components.nicehash.nicehash import NiceHashPrivateAPI
 from custom_components.nicehash.const import (
     API,
+    CLEANER,
+    CONFIG_ELECTRICITY_PRICE_ENTITY,
     CONFIG_FIAT,
     CONFIG_KEY,
     CONFIG_ORG_ID,
     CONFIG_SECRET,
+    CONFIG_STALE_GRACE_PERIOD,
     CONFIG_UPDATE_INTERVAL,
     DEFAULT_SCAN_INTERVAL_MINUTES,
+    DEFAULT_STALE_GRACE_PERIOD_MINUTES,
     NICEHASH_API_ENDPOINT,
     DOMAIN,
+    ELECTRICITY_PRICE,
+    POLICY,
+    SELECTION,
     SENSORS,
     SENSOR_DATA_COORDINATOR,
+    SIGNAL_OPTIONS_UPDATED,
+    STORAGE_KEY_ALGORITHMS,
+    STORAGE_KEY_PAYOUTS,
+    STORAGE_KEY_SNAPSHOT,
+    STORAGE_VERSION,
+    SWITCHES,
+    SWITCH_UNIQUE_IDS,
     UNSUB,
 )
-from custom_components.nicehash.common import NiceHashSensorDataUpdateCoordinator
+from custom_components.nicehash.algorithms import NiceHashAlgorithms
+from custom_components.nicehash.cleanup import NiceHashRegistryCleaner
+from custom_components.nicehash.common import (
+    NiceHashEntitySelection,
+    NiceHashSensorDataUpdateCoordinator,
+)
+from custom_components.nicehash.netprofit import NiceHashElectricityPrice
+from custom_components.nicehash.payouts import NiceHashPayouts
+from custom_components.nicehash.policy import NiceHashPolicyEngine
+from custom_components.nicehash.services import async_setup_services
+from custom_components.nicehash.transitions import NiceHashStatusTracker
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,28 +59,59 @@ PLATFORMS = ["sensor", "switch"]
 async def async_setup(hass: HomeAssistant, _):  # config: dict
     """Set up NiceHash sensor based on a config entry."""
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
 
     return True
 
 
+def _get_stale_grace_period(config_entry: ConfigEntry) -> timedelta:
+    return timedelta(
+        minutes=config_entry.options.get(
+            CONFIG_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD_MINUTES
+        )
+    )
+
+
 async def _update_coordinator(hass: HomeAssistant, config_entry: ConfigEntry):
+    """Apply the options without reloading the entry.
+
+    The entities deselected by the new options remove themselves and the
+    platforms add the newly selected ones, on SIGNAL_OPTIONS_UPDATED.
+    """
     coordinator = hass.data[DOMAIN][config_entry.entry_id].get(SENSOR_DATA_COORDINATOR)
-    if coordinator is not None and config_entry.data.get(
-        CONFIG_UPDATE_INTERVAL
-    ) != config_entry.options.get(CONFIG_UPDATE_INTERVAL):
+    if coordinator is None:
+        return
+    coordinator.stale_grace_period = _get_stale_grace_period(config_entry)
+    price = hass.data[DOMAIN][config_entry.entry_id].get(ELECTRICITY_PRICE)
+    if price is not None and price.entity_id != (
+        config_entry.options.get(CONFIG_ELECTRICITY_PRICE_ENTITY) or None
+    ):
+        price.async_start()
+        async_dispatcher_send(hass, price.signal)
+
+    new_data = config_entry.data.copy()
+    new_data[CONFIG_UPDATE_INTERVAL] = config_entry.options.get(
+        CONFIG_UPDATE_INTERVAL,
+        config_entry.data.get(CONFIG_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL_MINUTES),
+    )
+    new_data[CONFIG_FIAT] = config_entry.options.get(
+        CONFIG_FIAT, config_entry.data[CONFIG_FIAT]
+    )
+    if new_data != config_entry.data:
         coordinator.update_interval = timedelta(
-            minutes=config_entry.options[CONFIG_UPDATE_INTERVAL]
-        )
-        await coordinator.async_request_refresh()
-        new_data = config_entry.data.copy()
-        new_data[CONFIG_UPDATE_INTERVAL] = config_entry.options.get(
-            CONFIG_UPDATE_INTERVAL, DEFAULT_SCAN_INTERVAL_MINUTES
+            minutes=new_data[CONFIG_UPDATE_INTERVAL]
         )
+        coordinator.fiat = new_data[CONFIG_FIAT]
         hass.config_entries.async_update_entry(
             entry=config_entry,
             unique_id=config_entry.entry_id,
             data=new_data,
         )
+        # The currency sensors are created for the new currency once its
+        # rate is fetched
+        await coordinator.async_refresh()
+
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id))
 
 
 async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry) -> bool:
@@ -69,28 +125,82 @@ async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry) -> bool
         entry.data[CONFIG_SECRET],
     )
 
+    payouts = NiceHashPayouts(
+        api, Store(hass, STORAGE_VERSION, STORAGE_KEY_PAYOUTS.format(entry.entry_id))
+    )
+    await payouts.async_load()
+    algorithms = NiceHashAlgorithms(
+        api,
+        Store(hass, STORAGE_VERSION, STORAGE_KEY_ALGORITHMS.format(entry.entry_id)),
+    )
+    await algorithms.async_load()
+
     coordinator = NiceHashSensorDataUpdateCoordinator(
-        hass, api, entry.data[CONFIG_UPDATE_INTERVAL], entry.data[CONFIG_FIAT]
+        hass,
+        api,
+        entry.data[CONFIG_UPDATE_INTERVAL],
+        entry.data[CONFIG_FIAT],
+        Store(hass, STORAGE_VERSION, STORAGE_KEY_SNAPSHOT.format(entry.entry_id)),
+        payouts,
+        algorithms,
     )
 
-    try:
-        await api.get_mining_address()
-    except Exception as err:
-        raise ConfigEntryNotReady from err
+    coordinator.stale_grace_period = _get_stale_grace_period(entry)
+
+    # With a snapshot the entities are created from it right away and the
+    # first refresh runs in the background once all the platforms are set up.
+    warm_start = await coordinator.async_load_snapshot()
+    if not warm_start:
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
+
+    price = NiceHashElectricityPrice(hass, entry)
+    price.async_start()
+    policy = NiceHashPolicyEngine(hass, entry, api, coordinator, price)
+    cleaner = NiceHashRegistryCleaner(hass, entry, coordinator)
+    status_tracker = NiceHashStatusTracker(hass, coordinator)
 
     unsub = entry.add_update_listener(_update_coordinator)
     hass.data[DOMAIN][entry.entry_id].update(
         {
             SENSOR_DATA_COORDINATOR: coordinator,
             API: api,
-            UNSUB: [unsub],
+            ELECTRICITY_PRICE: price,
+            POLICY: policy,
+            CLEANER: cleaner,
+            SELECTION: NiceHashEntitySelection(entry),
+            UNSUB: [
+                unsub,
+                price.async_stop,
+                coordinator.async_stop_transitional,
+                coordinator.async_add_listener(coordinator.async_dispatch_channels),
+                coordinator.async_add_listener(policy.async_evaluate),
+                coordinator.async_add_listener(cleaner.async_cleanup),
+                coordinator.async_add_listener(status_tracker.async_track),
+                # The cleaner only counts the full refreshes
+                coordinator.async_add_transitional_listener(policy.async_evaluate),
+                coordinator.async_add_transitional_listener(
+                    status_tracker.async_track
+                ),
+            ],
             SENSORS: [],
+            SWITCHES: [],
+            SWITCH_UNIQUE_IDS: [],
         }
     )
-    for platform in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setup(entry, platform)
+
+    async def _async_setup_platforms():
+        await asyncio.gather(
+            *[
+                hass.config_entries.async_forward_entry_setup(entry, platform)
+                for platform in PLATFORMS
+            ]
         )
+        if warm_start:
+            await coordinator.async_refresh()
+
+    hass.async_create_task(_async_setup_platforms())
 
     return True
 
@@ -133,6 +243,14 @@ async def async_unload_entry(hass, config_entry: ConfigEntry):
     return unload_ok
 
 
+async def async_remove_entry(hass, config_entry: ConfigEntry) -> None:
+    """Remove the persisted data of a deleted config entry."""
+    for key in [STORAGE_KEY_SNAPSHOT, STORAGE_KEY_PAYOUTS, STORAGE_KEY_ALGORITHMS]:
+        await Store(
+            hass, STORAGE_VERSION, key.format(config_entry.entry_id)
+        ).async_remove()
+
+
 async def update_listener(hass, config_entry):
     """Reload device tracker if change option."""
     await hass.config_entries.async_reload(config_entry.entry_id)
@@ -0,0 +1,85 @@
+"""Persisted cache of the NiceHash mining algorithms metadata."""
+from datetime import timedelta
+from logging import getLogger
+from typing import Optional
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from custom_components.nicehash.nicehash import NiceHashPrivateAPI
+from custom_components.nicehash.const import ALGORITHMS_UPDATE_INTERVAL_HOURS
+
+_LOGGER = getLogger(__name__)
+
+
+class NiceHashAlgorithms:
+    """Display unit, mining and market factors of every algorithm.
+
+    The metadata is loaded from disk at startup and only fetched again once
+    older than ALGORITHMS_UPDATE_INTERVAL_HOURS. When the fetch fails the
+    expired metadata keeps being used. Without a store it is only kept in
+    memory.
+    """
+
+    def __init__(self, api: NiceHashPrivateAPI, store: Store = None) -> None:
+        """Initialize."""
+        self._api = api
+        self._store = store
+        self._updated_at = None
+        self._update_interval = timedelta(hours=ALGORITHMS_UPDATE_INTERVAL_HOURS)
+        # algorithm -> {"unit", "miningFactor", "marketFactor"}
+        self._algorithms = {}
+
+    async def async_load(self) -> None:
+        """Load the persisted metadata."""
+        if self._store is None:
+            return
+        stored = await self._store.async_load()
+        if stored:
+            self._algorithms = stored.get("algorithms", {})
+            self._updated_at = dt_util.parse_datetime(stored.get("time", ""))
+
+    async def async_update(self) -> None:
+        """Fetch the metadata if the cached one expired."""
+        now = dt_util.utcnow()
+        if self._updated_at is not None and now - self._updated_at < self._update_interval:
+            return
+        try:
+            algorithms = await self._api.get_algorithms()
+        except Exception as err:
+            _LOGGER.warning("Failed to update the algorithms metadata: %s", err)
+            return
+
+        self._algorithms = {
+            algo.get("algorithm"): {
+                "unit": f"{algo.get('displayMiningFactor')}/s"
+                if algo.get("displayMiningFactor")
+                else None,
+                "miningFactor": float(algo.get("miningFactor", 1) or 1),
+                "marketFactor": float(algo.get("marketFactor", 1) or 1),
+            }
+            for algo in algorithms.get("miningAlgorithms", [])
+        }
+        self._updated_at = now
+        if self._store is not None:
+            self._store.async_delay_save(
+                lambda: {"time": now.isoformat(), "algorithms": self._algorithms}, 0
+            )
+
+    def unit(self, algorithm: str) -> Optional[str]:
+        """Return the display unit of the speeds of an algorithm."""
+        return self._algorithms.get(algorithm, {}).get("unit")
+
+    def mining_factor(self, algorithm: str) -> Optional[float]:
+        """Return the factor scaling a displayed speed to units per second.
+
+        None when the algorithm is unknown.
+        """
+        return self._algorithms.get(algorithm, {}).get("miningFactor")
+
+    def market_factor(self, algorithm: str) -> Optional[float]:
+        """Return the factor the paying rate of an algorithm is expressed in.
+
+        None when the algorithm is unknown.
+        """
+        return self._algorithms.get(algorithm, {}).get("marketFactor")
@@ -0,0 +1,176 @@
+"""Removal of the entities and devices of rigs and groups gone from the organisation."""
+from logging import getLogger
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.nicehash.common import NiceHashSensorDataUpdateCoordinator
+from custom_components.nicehash.const import (
+    CONFIG_REMOVED_RIG_CYCLES,
+    DEFAULT_REMOVED_RIG_CYCLES,
+    DOMAIN,
+    FLEET_OBJ,
+    GROUP_SWITCH_UNIQUE_ID,
+    RIGS_OBJ,
+    SENSORS,
+    SWITCH_UNIQUE_IDS,
+    SWITCHES,
+)
+
+_LOGGER = getLogger(__name__)
+
+
+class NiceHashRegistryCleaner:
+    """Remove the rigs, devices and groups missing from rigs2 for too many refreshes.
+
+    A removed rig loses its device registry entry and all its entities, a
+    device removed from a rig still present loses its entities. A group no
+    rig belongs to anymore loses its switch.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: NiceHashSensorDataUpdateCoordinator,
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._config_entry = config_entry
+        self._coordinator = coordinator
+        # rig id or (rig id, device id) -> consecutive refreshes missing
+        self._missing = {}
+        self._tracked = None
+        # group name -> consecutive refreshes missing
+        self._missing_groups = {}
+        self._tracked_groups = None
+
+    def _registered_rigs(self):
+        """Return the rig ids with a device registered for the entry."""
+        device_registry = dr.async_get(self._hass)
+        rigs = set()
+        for device in dr.async_entries_for_config_entry(
+            device_registry, self._config_entry.entry_id
+        ):
+            for domain, identifier in device.identifiers:
+                if domain == DOMAIN and identifier != (
+                    f"{self._config_entry.entry_id}_{self._config_entry.data['name']}"
+                ):
+                    rigs.add(identifier)
+        return rigs
+
+    def _registered_groups(self):
+        """Return the group names with a switch registered for the entry."""
+        prefix, suffix = GROUP_SWITCH_UNIQUE_ID.format(
+            self._config_entry.data["name"], "\0"
+        ).split("\0")
+        entity_registry = er.async_get(self._hass)
+        return {
+            entry.unique_id[len(prefix) : -len(suffix)]
+            for entry in er.async_entries_for_config_entry(
+                entity_registry, self._config_entry.entry_id
+            )
+            if entry.unique_id.startswith(prefix) and entry.unique_id.endswith(suffix)
+        }
+
+    @callback
+    def async_cleanup(self) -> None:
+        """Count the missing rigs and devices, remove the ones gone for good."""
+        cycles = self._config_entry.options.get(
+            CONFIG_REMOVED_RIG_CYCLES, DEFAULT_REMOVED_RIG_CYCLES
+        )
+        if not cycles:
+            return
+        if not self._coordinator.last_update_success or self._coordinator.data is None:
+            return
+
+        present = set()
+        for rig in self._coordinator.data[RIGS_OBJ].get("miningRigs", []):
+            rig_id = rig.get("rigId")
+            present.add(rig_id)
+            for device in rig.get("devices", []):
+                present.add((rig_id, device.get("id")))
+
+        if self._tracked is None:
+            # Also catch the rigs removed while Home Assistant was stopped
+            self._tracked = self._registered_rigs()
+        self._tracked |= present
+
+        removed = []
+        for target in self._tracked - present:
+            if isinstance(target, tuple) and target[0] not in present:
+                # Handled with its rig
+                self._missing.pop(target, None)
+                continue
+            self._missing[target] = self._missing.get(target, 0) + 1
+            if self._missing[target] >= cycles:
+                removed.append(target)
+        for target in present:
+            self._missing.pop(target, None)
+
+        for target in removed:
+            self._remove(target)
+
+        groups = set(self._coordinator.data.get(FLEET_OBJ, {}).get("groups", {}))
+        if self._tracked_groups is None:
+            self._tracked_groups = self._registered_groups()
+        self._tracked_groups |= groups
+        removed_groups = []
+        for group in self._tracked_groups - groups:
+            self._missing_groups[group] = self._missing_groups.get(group, 0) + 1
+            if self._missing_groups[group] >= cycles:
+                removed_groups.append(group)
+        for group in groups:
+            self._missing_groups.pop(group, None)
+
+        for group in removed_groups:
+            self._remove_group(group)
+
+    def _remove(self, target) -> None:
+        if isinstance(target, tuple):
+            prefix = f"nh-{target[0]}-{target[1]}-"
+            _LOGGER.info("Removing device %s of rig %s", target[1], target[0])
+        else:
+            prefix = f"nh-{target}-"
+            _LOGGER.info("Removing rig %s", target)
+            device_registry = dr.async_get(self._hass)
+            device = device_registry.async_get_device({(DOMAIN, target)})
+            if device is not None:
+                device_registry.async_remove_device(device.id)
+
+        self._remove_entities(lambda unique_id: unique_id.startswith(prefix))
+
+        self._tracked = {
+            tracked
+            for tracked in self._tracked
+            if tracked != target
+            and not (isinstance(tracked, tuple) and tracked[0] == target)
+        }
+        self._missing.pop(target, None)
+
+    def _remove_group(self, group) -> None:
+        _LOGGER.info("Removing group %s", group)
+        unique_id = GROUP_SWITCH_UNIQUE_ID.format(self._config_entry.data["name"], group)
+        self._remove_entities(lambda candidate: candidate == unique_id)
+        self._tracked_groups.discard(group)
+        self._missing_groups.pop(group, None)
+
+    def _remove_entities(self, matches) -> None:
+        """Remove the entities whose unique id matches."""
+        entity_registry = er.async_get(self._hass)
+        for entry in er.async_entries_for_config_entry(
+            entity_registry, self._config_entry.entry_id
+        ):
+            if matches(entry.unique_id):
+                entity_registry.async_remove(entry.entity_id)
+
+        # Let the platforms create the entities again if the target comes back
+        entry_data = self._hass.data[DOMAIN][self._config_entry.entry_id]
+        for key in [SENSORS, SWITCH_UNIQUE_IDS]:
+            entry_data[key][:] = [
+                unique_id for unique_id in entry_data[key] if not matches(unique_id)
+            ]
+        entry_data[SWITCHES][:] = [
+            switch for switch in entry_data[SWITCHES] if not matches(switch.unique_id)
+        ]
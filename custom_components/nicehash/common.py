@@ -1,23 +1,206 @@
 """Common classes and functions for NiceHash."""
+import asyncio
 from datetime import timedelta
+from fnmatch import fnmatchcase
+from functools import wraps
 from logging import getLogger
-from typing import Any, Dict
+from time import monotonic
+from typing import Any, Dict, Optional
 import async_timeout
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 
-from custom_components.nicehash.nicehash import NiceHashPrivateAPI
+from custom_components.nicehash.algorithms import NiceHashAlgorithms
+from custom_components.nicehash.nicehash import NiceHashPrivateAPI, normalize_value
+from custom_components.nicehash.fleet import aggregate_fleet
+from custom_components.nicehash.netprofit import aggregate_power
+from custom_components.nicehash.payouts import NiceHashPayouts
+from custom_components.nicehash.profitability import NiceHashProfitabilityEngine
+from custom_components.nicehash.timeseries import NiceHashTrends
 from custom_components.nicehash.const import (
+    ACCOUNT_FIELDS,
     ACCOUNT_OBJ,
+    CONFIG_DEADBAND_ABSOLUTE,
+    CONFIG_CURRENCY_VARIANTS,
+    CONFIG_DEADBAND_RELATIVE,
+    CONFIG_METRICS,
+    CONFIG_MIN_PUBLISH_INTERVAL,
+    CONFIG_RIG_GROUPS,
+    CONFIG_RIG_NAME_PATTERN,
+    CURRENCY_FIAT,
+    CURRENCY_VARIANTS,
     DOMAIN,
+    EXPECTED_OBJ,
+    FLEET_OBJ,
+    METRICS,
+    PAYOUTS_OBJ,
+    POWER_OBJ,
+    RIGS_FIELDS,
     RIGS_OBJ,
+    SELECTION,
+    SENSORS,
+    SIGNAL_OPTIONS_UPDATED,
+    SNAPSHOT_SAVE_DELAY_SECONDS,
+    SWITCH_UNIQUE_IDS,
+    SWITCHES,
+    TRANSITIONAL_MINER_STATUSES,
+    TRANSITIONAL_REFRESH_SECONDS,
+    TRENDS_OBJ,
 )
 
 _LOGGER = getLogger(__name__)
 
 
+def cached_property(func):
+    """Property computed once per entity, for values that never change."""
+    attr = f"_cache_{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(self):
+        try:
+            return self.__dict__[attr]
+        except KeyError:
+            value = self.__dict__[attr] = func(self)
+            return value
+
+    return property(wrapper)
+
+
+def generation_cached_property(func):
+    """Property computed once per generation of the data it depends on.
+
+    The entities of a rig are keyed on the generation of the rig, so that a
+    refresh only changing other rigs keeps their cache. The others are keyed
+    on the generation of the whole data. The entity must have a
+    NiceHashSensorDataUpdateCoordinator as coordinator.
+    """
+    attr = f"_cache_{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(self):
+        rig_id = getattr(self, "_rig_id", None)
+        if rig_id is None:
+            generation = self.coordinator.data_generation
+        else:
+            generation = self.coordinator.rig_generation(rig_id)
+        cached = self.__dict__.get(attr)
+        if cached is None or cached[0] != generation:
+            cached = self.__dict__[attr] = (generation, func(self))
+        return cached[1]
+
+    return property(wrapper)
+
+
+def project_fields(value, fields):
+    """Return value with only the fields declared in fields, recursively."""
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: project_fields(value[key], sub_fields)
+            for key, sub_fields in fields.items()
+            if key in value
+        }
+    return value
+
+
+class NiceHashCoordinatorEntity(Entity):
+    """Entity only updated when the data of its listener channels changed.
+
+    It does not listen to the coordinator itself, only to its channels, so a
+    refresh only wakes the entities whose data changed. The entity removes
+    itself once the options no longer select it.
+    """
+
+    _rig_id = None
+    selection_metric = None
+
+    def __init__(self, coordinator: "NiceHashSensorDataUpdateCoordinator") -> None:
+        """Initialize."""
+        self.coordinator = coordinator
+
+    @property
+    def should_poll(self) -> bool:
+        """No polling, the coordinator notifies the entity."""
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Return availability"""
+        return self.coordinator.data_available
+
+    async def async_update(self) -> None:
+        """Update the entity, only used by the generic update entity service."""
+        await self.coordinator.async_request_refresh()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state on a change of the channels of the entity."""
+        self.async_write_ha_state()
+
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        return []
+
+    def is_selected(self, selection: "NiceHashEntitySelection") -> bool:
+        """Return True if the options still select the entity."""
+        if self.selection_metric is not None and not selection.metric(
+            self.selection_metric
+        ):
+            return False
+        rig = self.coordinator.get_rig(self._rig_id) if self._rig_id else None
+        return rig is None or selection.rig(rig)
+
+    @callback
+    def _async_options_updated(self) -> None:
+        entry_data = self.hass.data[DOMAIN][self._config_entry.entry_id]
+        if self.is_selected(entry_data[SELECTION]):
+            return
+
+        # Let the platforms create the entity again once selected again
+        for key in [SENSORS, SWITCH_UNIQUE_IDS]:
+            if self.unique_id in entry_data[key]:
+                entry_data[key].remove(self.unique_id)
+        if self in entry_data[SWITCHES]:
+            entry_data[SWITCHES].remove(self)
+        if self.registry_entry is not None:
+            er.async_get(self.hass).async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove())
+
+    async def async_added_to_hass(self):
+        """Listen to the coordinator channels of the entity."""
+        await super().async_added_to_hass()
+        for channel in set(self.listener_channels):
+            self.async_on_remove(
+                self.coordinator.async_add_channel_listener(
+                    channel, self._handle_coordinator_update
+                )
+            )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_OPTIONS_UPDATED.format(self._config_entry.entry_id),
+                self._async_options_updated,
+            )
+        )
+
+
 class NiceHashSensorDataUpdateCoordinator(DataUpdateCoordinator):
     """Define an object to hold NiceHash data."""
 
@@ -27,6 +210,9 @@ class NiceHashSensorDataUpdateCoordinator(DataUpdateCoordinator):
         api: NiceHashPrivateAPI,
         update_interval: int,
         fiat="USD",
+        store: Store = None,
+        payouts: NiceHashPayouts = None,
+        algorithms: NiceHashAlgorithms = None,
     ) -> None:
         """Initialize."""
         super().__init__(
@@ -37,7 +223,275 @@ class NiceHashSensorDataUpdateCoordinator(DataUpdateCoordinator):
             update_method=self._async_update_data,
         )
         self._api = api
-        self._fiat = fiat
+        self.fiat = fiat
+        self._store = store
+        self.algorithms = algorithms or NiceHashAlgorithms(api)
+        self.profitability = NiceHashProfitabilityEngine(api, self.algorithms)
+        self.trends = NiceHashTrends()
+        self._payouts = payouts
+        self.last_success_time = None
+        self.stale_grace_period = timedelta(0)
+        self._indexed_data = None
+        self._generation = 0
+        self._rigs = {}
+        self._rig_generations = {}
+        self._devices = {}
+        self._channel_listeners = {}
+        self._dispatched_data = None
+        self._dispatched_success = True
+        self._transitional = set()
+        self._transitional_listeners = []
+        self._transitional_running = False
+        self._unsub_transitional = None
+
+    def _index_data(self) -> None:
+        """Index the rigs and devices of the data, once per data generation."""
+        if self.data is self._indexed_data:
+            return
+        self._indexed_data = self.data
+        self._generation += 1
+        previous_rigs = self._rigs
+        self._rigs = {}
+        self._devices = {}
+        if self.data is None:
+            self._rig_generations = {}
+            return
+        rig_generations = {}
+        for rig in self.data[RIGS_OBJ].get("miningRigs", []):
+            rig_id = rig.get("rigId")
+            self._rigs[rig_id] = rig
+            if rig_id in self._rig_generations and previous_rigs.get(rig_id) == rig:
+                rig_generations[rig_id] = self._rig_generations[rig_id]
+            else:
+                rig_generations[rig_id] = self._generation
+            for device in rig.get("devices", []):
+                self._devices[(rig_id, device.get("id"))] = device
+        self._rig_generations = rig_generations
+
+    @property
+    def data_generation(self) -> int:
+        """Return a number changing every time the data is replaced."""
+        self._index_data()
+        return self._generation
+
+    def rig_generation(self, rig_id: str) -> int:
+        """Return a number changing every time the data of a rig changes.
+
+        A rig missing from the data changes with every data generation.
+        """
+        self._index_data()
+        return self._rig_generations.get(rig_id, self._generation)
+
+    def get_rig(self, rig_id: str) -> Optional[Dict[str, Any]]:
+        """Return the rig object."""
+        self._index_data()
+        return self._rigs.get(rig_id)
+
+    def get_device(self, rig_id: str, device_id: str) -> Optional[Dict[str, Any]]:
+        """Return the device object."""
+        self._index_data()
+        return self._devices.get((rig_id, device_id))
+
+    @property
+    def data_age(self) -> Optional[timedelta]:
+        """Return the age of the current data."""
+        if self.last_success_time is None:
+            return None
+        return dt_util.utcnow() - self.last_success_time
+
+    @property
+    def data_available(self) -> bool:
+        """Return True if the data is fresh or still within the grace period."""
+        if self.last_update_success:
+            return True
+        age = self.data_age
+        return age is not None and age <= self.stale_grace_period
+
+    def stale_attributes(self) -> Dict[str, Any]:
+        """Return the attributes flagging entities served with stale data."""
+        if self.last_update_success or self.data_age is None:
+            return {}
+        return {"data_age": int(self.data_age.total_seconds())}
+
+    @callback
+    def async_add_channel_listener(self, channel: str, update_callback):
+        """Listen for the updates changing the data of a channel.
+
+        The channels are the rig ids, for the data of a rig, and the data
+        sections (ACCOUNT_OBJ, RIGS_OBJ for the rigs totals, PAYOUTS_OBJ...).
+        """
+        listeners = self._channel_listeners.setdefault(channel, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _changed_channels(self, previous, data) -> Optional[set]:
+        """Return the channels whose data changed, None for all of them."""
+        if previous is None or data is None:
+            return None
+        changed = {
+            section
+            for section in [ACCOUNT_OBJ, PAYOUTS_OBJ, POWER_OBJ, FLEET_OBJ]
+            if previous.get(section) != data.get(section)
+        }
+        previous_rigs = {
+            rig.get("rigId"): rig
+            for rig in previous[RIGS_OBJ].get("miningRigs", [])
+        }
+        totals = {key: value for key, value in data[RIGS_OBJ].items() if key != "miningRigs"}
+        if totals != {
+            key: value for key, value in previous[RIGS_OBJ].items() if key != "miningRigs"
+        }:
+            changed.add(RIGS_OBJ)
+
+        for rig in data[RIGS_OBJ].get("miningRigs", []):
+            rig_id = rig.get("rigId")
+            if (
+                previous_rigs.pop(rig_id, None) != rig
+                or previous.get(EXPECTED_OBJ, {}).get(rig_id)
+                != data.get(EXPECTED_OBJ, {}).get(rig_id)
+                or previous.get(POWER_OBJ, {}).get("rigs", {}).get(rig_id)
+                != data.get(POWER_OBJ, {}).get("rigs", {}).get(rig_id)
+                or previous.get(TRENDS_OBJ, {}).get(rig_id)
+                != data.get(TRENDS_OBJ, {}).get(rig_id)
+            ):
+                changed.add(rig_id)
+        # Removed rigs, their entities become unavailable
+        changed.update(previous_rigs)
+        return changed
+
+    @callback
+    def async_dispatch_channels(self) -> None:
+        """Call the listeners of the channels changed since the last dispatch.
+
+        Registered as a coordinator listener by the config entry setup. A
+        failed refresh, and the first one after, notifies every channel for
+        the entities to update their availability and data age.
+        """
+        changed = None
+        if self.last_update_success and self._dispatched_success:
+            changed = self._changed_channels(self._dispatched_data, self.data)
+        self._dispatched_data = self.data
+        self._dispatched_success = self.last_update_success
+
+        callbacks = {}
+        for channel, listeners in self._channel_listeners.items():
+            if changed is None or channel in changed:
+                for update_callback in listeners:
+                    callbacks[id(update_callback)] = update_callback
+        for update_callback in callbacks.values():
+            update_callback()
+
+    @callback
+    def _async_update_transitional(self, rigs) -> None:
+        """Poll the rigs in a transitional status faster than the fleet."""
+        self._transitional = {
+            rig.get("rigId")
+            for rig in rigs
+            if rig.get("minerStatus") in TRANSITIONAL_MINER_STATUSES
+        }
+        if self._transitional and self._unsub_transitional is None:
+            self._unsub_transitional = async_track_time_interval(
+                self.hass,
+                self._async_refresh_transitional,
+                timedelta(seconds=TRANSITIONAL_REFRESH_SECONDS),
+            )
+        elif not self._transitional:
+            self.async_stop_transitional()
+
+    @callback
+    def async_add_transitional_listener(self, update_callback):
+        """Listen for the rigs in a transitional status merged in the data.
+
+        The coordinator listeners only run on the full refreshes.
+        """
+        self._transitional_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._transitional_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_stop_transitional(self) -> None:
+        """Stop polling the rigs in a transitional status."""
+        if self._unsub_transitional is not None:
+            self._unsub_transitional()
+            self._unsub_transitional = None
+
+    async def _async_refresh_transitional(self, _now=None) -> None:
+        """Fetch the rigs in a transitional status and merge them in the data.
+
+        A run still fetching when the next one is due skips the next one.
+        """
+        if self.data is None or self._transitional_running:
+            return
+        self._transitional_running = True
+        try:
+            updated = {}
+            for rig_id in self._transitional:
+                try:
+                    async with async_timeout.timeout(10):
+                        updated[rig_id] = project_fields(
+                            await self._api.get_rig_data(rig_id),
+                            RIGS_FIELDS["miningRigs"],
+                        )
+                except Exception as err:
+                    _LOGGER.debug("Failed to refresh rig %s: %s", rig_id, err)
+        finally:
+            self._transitional_running = False
+        if not updated or self.data is None:
+            return
+
+        rigs = {
+            **self.data[RIGS_OBJ],
+            "miningRigs": [
+                updated.get(rig.get("rigId"), rig)
+                for rig in self.data[RIGS_OBJ].get("miningRigs", [])
+            ],
+        }
+        # The trends only sample the full refreshes, at a regular interval
+        self.data = {
+            **self._build_data(rigs, self.data[ACCOUNT_OBJ]),
+            TRENDS_OBJ: self.data.get(TRENDS_OBJ, {}),
+        }
+        self._async_update_transitional(rigs.get("miningRigs"))
+        self.async_dispatch_channels()
+        for update_callback in list(self._transitional_listeners):
+            update_callback()
+
+    async def async_load_snapshot(self) -> bool:
+        """Use the last persisted data as current data, True if there was one."""
+        if self._store is None:
+            return False
+        snapshot = await self._store.async_load()
+        if not snapshot or snapshot.get("fiat") != self.fiat:
+            return False
+        self.data = {
+            **snapshot["data"],
+            RIGS_OBJ: project_fields(snapshot["data"][RIGS_OBJ], RIGS_FIELDS),
+            ACCOUNT_OBJ: project_fields(snapshot["data"][ACCOUNT_OBJ], ACCOUNT_FIELDS),
+        }
+        self.last_success_time = dt_util.parse_datetime(snapshot.get("time", ""))
+        return True
+
+    def _build_data(self, rigs, account) -> Dict[str, Any]:
+        """Return the data with the values derived from the rigs and account."""
+        data = {
+            RIGS_OBJ: rigs,
+            ACCOUNT_OBJ: account,
+            EXPECTED_OBJ: self.profitability.compute(rigs),
+            POWER_OBJ: aggregate_power(rigs),
+            FLEET_OBJ: aggregate_fleet(rigs),
+        }
+        if self._payouts is not None:
+            data[PAYOUTS_OBJ] = self._payouts.summary()
+        return data
 
     async def _async_update_data(self) -> Dict[str, Any]:
         """Fetch data from API endpoint."""
@@ -45,7 +499,163 @@ class NiceHashSensorDataUpdateCoordinator(DataUpdateCoordinator):
             async with async_timeout.timeout(10):
                 rigs = await self._api.get_rigs_data()
                 _LOGGER.debug(f"API Rigs response: {rigs}")
-                account = await self._api.get_account_data(self._fiat)
-                return {RIGS_OBJ: rigs, ACCOUNT_OBJ: account}
+                rigs = project_fields(rigs, RIGS_FIELDS)
+                account = project_fields(
+                    await self._api.get_account_data(self.fiat), ACCOUNT_FIELDS
+                )
         except Exception as err:
             raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        # The public metadata and rates have their own timeout, a slow call
+        # keeps the cached ones instead of failing the refresh
+        for name, update in [
+            ("algorithms metadata", self.algorithms.async_update),
+            ("paying rates", self.profitability.async_update_rates),
+        ]:
+            try:
+                async with async_timeout.timeout(10):
+                    await update()
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timeout updating the %s", name)
+
+        if self._payouts is not None:
+            # The first synchronisation can page through years of history,
+            # it must not hold the refresh.
+            self.hass.async_create_task(self._payouts.async_sync())
+        data = self._build_data(rigs, account)
+        data[TRENDS_OBJ] = self.trends.update(rigs)
+        self._async_update_transitional(rigs.get("miningRigs", []))
+        self.last_success_time = dt_util.utcnow()
+        if self._store is not None:
+            self._store.async_delay_save(
+                lambda: {
+                    "fiat": self.fiat,
+                    "time": self.last_success_time.isoformat(),
+                    "data": data,
+                },
+                SNAPSHOT_SAVE_DELAY_SECONDS,
+            )
+        return data
+
+
+class NiceHashStateFilter:
+    """Deadband and minimum publish interval filter for numeric states.
+
+    The thresholds are read from the config entry options on every sample so
+    that an options change applies without recreating the entities. A value
+    only held back by the minimum interval sets held_for, the seconds left
+    before it can be published.
+    """
+
+    def __init__(self, config_entry: ConfigEntry, filter_type: str) -> None:
+        """Initialize."""
+        self._config_entry = config_entry
+        self._filter_type = filter_type
+        self.value = None
+        self.published = False
+        self.held_for = None
+        self._published_at = None
+
+    def _option(self, key: str) -> float:
+        return float(
+            self._config_entry.options.get(f"{self._filter_type}_{key}", 0) or 0
+        )
+
+    def accept(self, value, scale: float = 1) -> bool:
+        """Return True and remember the value if it should be published.
+
+        The absolute deadband is multiplied by scale, which lets converted
+        sensors share the deadband configured for the BTC amount.
+        """
+        self.held_for = None
+        if self.published and not self._is_significant(value, scale):
+            return False
+        self.value = value
+        self.published = True
+        self._published_at = monotonic()
+        return True
+
+    def _is_significant(self, value, scale: float) -> bool:
+        if value == self.value:
+            return False
+        if not isinstance(value, (int, float)) or not isinstance(
+            self.value, (int, float)
+        ):
+            return True
+
+        delta = abs(value - self.value)
+        absolute = self._option(CONFIG_DEADBAND_ABSOLUTE)
+        if absolute and delta <= absolute * scale:
+            return False
+        relative = self._option(CONFIG_DEADBAND_RELATIVE)
+        if relative and self.value and delta * 100 / abs(self.value) <= relative:
+            return False
+
+        min_interval = self._option(CONFIG_MIN_PUBLISH_INTERVAL)
+        elapsed = monotonic() - self._published_at
+        if min_interval and elapsed < min_interval:
+            self.held_for = min_interval - elapsed
+            return False
+        return True
+
+
+class NiceHashRequestLimiter:
+    """Bound the number of concurrent API requests and their start rate."""
+
+    def __init__(self, max_concurrent: int, min_interval: float) -> None:
+        """Initialize."""
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._lock = asyncio.Lock()
+        self._min_interval = min_interval
+        self._last_start = 0
+
+    async def run(self, coro):
+        """Await coro once a concurrency slot and the rate limit allow it."""
+        async with self._semaphore:
+            async with self._lock:
+                wait = self._last_start + self._min_interval - monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start = monotonic()
+            return await coro
+
+
+class NiceHashEntitySelection:
+    """Rigs, metrics and currency variants selected in the options.
+
+    Nothing is filtered out until the options say otherwise.
+    """
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize."""
+        self._config_entry = config_entry
+
+    def rig(self, rig) -> bool:
+        """Return True if the entities of the rig must be created."""
+        options = self._config_entry.options
+        pattern = options.get(CONFIG_RIG_NAME_PATTERN) or "*"
+        if not fnmatchcase((rig.get("name") or "").lower(), pattern.lower()):
+            return False
+        return self.group(rig.get("groupName"))
+
+    def group(self, group_name) -> bool:
+        """Return True if the entities of the group must be created."""
+        options = self._config_entry.options
+        groups = [
+            group.strip().lower()
+            for group in (options.get(CONFIG_RIG_GROUPS) or "").split(",")
+            if group.strip()
+        ]
+        return not groups or (group_name or "").lower() in groups
+
+    def metric(self, metric: str) -> bool:
+        """Return True if the entities of the metric must be created."""
+        return metric in self._config_entry.options.get(CONFIG_METRICS, METRICS)
+
+    @property
+    def variants(self):
+        """Return the convert flags of the selected currency variants."""
+        currencies = self._config_entry.options.get(
+            CONFIG_CURRENCY_VARIANTS, CURRENCY_VARIANTS
+        )
+        return [currency == CURRENCY_FIAT for currency in currencies]
@@ -2,18 +2,44 @@
 import logging
 from homeassistant import config_entries
 from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.selector import selector
 import voluptuous as vol
-from voluptuous.validators import All, Range
+from voluptuous.validators import All, Coerce, Range
 from custom_components.nicehash.const import (
+    CONFIG_DEADBAND_ABSOLUTE,
+    CONFIG_DEADBAND_RELATIVE,
+    CONFIG_ELECTRICITY_PRICE_ENTITY,
+    CONFIG_CURRENCY_VARIANTS,
     CONFIG_ENTRY_VERSION,
     CONFIG_FIAT,
     CONFIG_KEY,
+    CONFIG_METRICS,
+    CONFIG_MIN_PUBLISH_INTERVAL,
     CONFIG_NAME,
     CONFIG_ORG_ID,
+    CONFIG_POLICY_COOLDOWN,
+    CONFIG_POLICY_ENABLED,
+    CONFIG_POLICY_MAX_TEMPERATURE,
+    CONFIG_POLICY_PROFIT_HYSTERESIS,
+    CONFIG_POLICY_TEMPERATURE_HYSTERESIS,
+    CONFIG_REMOVED_RIG_CYCLES,
+    CONFIG_RIG_GROUPS,
+    CONFIG_RIG_NAME_PATTERN,
     CONFIG_SECRET,
+    CONFIG_STALE_GRACE_PERIOD,
     CONFIG_UPDATE_INTERVAL,
+    CURRENCY_VARIANTS,
+    DEFAULT_POLICY_COOLDOWN_MINUTES,
+    DEFAULT_POLICY_MAX_TEMPERATURE,
+    DEFAULT_POLICY_PROFIT_HYSTERESIS,
+    DEFAULT_POLICY_TEMPERATURE_HYSTERESIS,
+    DEFAULT_REMOVED_RIG_CYCLES,
     DEFAULT_SCAN_INTERVAL_MINUTES,
+    DEFAULT_STALE_GRACE_PERIOD_MINUTES,
     DOMAIN,
+    FILTER_TYPES,
+    METRICS,
     NICEHASH_API_ENDPOINT,
 )
 from custom_components.nicehash.nicehash import NiceHashPrivateAPI
@@ -87,14 +113,91 @@ class NiceHashOptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
-        return self.async_show_form(
-            step_id="init",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(
-                        CONFIG_UPDATE_INTERVAL,
-                        default=self.config_entry.data.get(CONFIG_UPDATE_INTERVAL),
-                    ): All(int, Range(min=1, max=30))
-                }
-            ),
-        )
+        options = self.config_entry.options
+        schema = {
+            vol.Required(
+                CONFIG_UPDATE_INTERVAL,
+                default=self.config_entry.data.get(CONFIG_UPDATE_INTERVAL),
+            ): All(int, Range(min=1, max=30)),
+            vol.Required(
+                CONFIG_FIAT,
+                default=self.config_entry.data.get(CONFIG_FIAT),
+            ): str,
+            vol.Required(
+                CONFIG_STALE_GRACE_PERIOD,
+                default=options.get(
+                    CONFIG_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD_MINUTES
+                ),
+            ): All(int, Range(min=0, max=1440)),
+            vol.Required(
+                CONFIG_REMOVED_RIG_CYCLES,
+                default=options.get(
+                    CONFIG_REMOVED_RIG_CYCLES, DEFAULT_REMOVED_RIG_CYCLES
+                ),
+            ): All(int, Range(min=0, max=10000)),
+            # An empty selector disables the electricity cost sensors, so the
+            # current entity is only suggested, not defaulted
+            vol.Optional(
+                CONFIG_ELECTRICITY_PRICE_ENTITY,
+                description={
+                    "suggested_value": options.get(CONFIG_ELECTRICITY_PRICE_ENTITY)
+                },
+            ): selector({"entity": {"domain": ["sensor", "input_number"]}}),
+            vol.Required(
+                CONFIG_POLICY_ENABLED,
+                default=options.get(CONFIG_POLICY_ENABLED, False),
+            ): bool,
+            vol.Required(
+                CONFIG_POLICY_MAX_TEMPERATURE,
+                default=options.get(
+                    CONFIG_POLICY_MAX_TEMPERATURE, DEFAULT_POLICY_MAX_TEMPERATURE
+                ),
+            ): All(int, Range(min=0, max=150)),
+            vol.Required(
+                CONFIG_POLICY_TEMPERATURE_HYSTERESIS,
+                default=options.get(
+                    CONFIG_POLICY_TEMPERATURE_HYSTERESIS,
+                    DEFAULT_POLICY_TEMPERATURE_HYSTERESIS,
+                ),
+            ): All(int, Range(min=0, max=50)),
+            vol.Required(
+                CONFIG_POLICY_PROFIT_HYSTERESIS,
+                default=options.get(
+                    CONFIG_POLICY_PROFIT_HYSTERESIS, DEFAULT_POLICY_PROFIT_HYSTERESIS
+                ),
+            ): All(int, Range(min=0, max=1000)),
+            vol.Required(
+                CONFIG_POLICY_COOLDOWN,
+                default=options.get(
+                    CONFIG_POLICY_COOLDOWN, DEFAULT_POLICY_COOLDOWN_MINUTES
+                ),
+            ): All(int, Range(min=1, max=1440)),
+            vol.Optional(
+                CONFIG_RIG_NAME_PATTERN,
+                default=options.get(CONFIG_RIG_NAME_PATTERN, "*"),
+            ): str,
+            vol.Optional(
+                CONFIG_RIG_GROUPS,
+                default=options.get(CONFIG_RIG_GROUPS, ""),
+            ): str,
+            vol.Required(
+                CONFIG_METRICS,
+                default=options.get(CONFIG_METRICS, METRICS),
+            ): cv.multi_select(METRICS),
+            vol.Required(
+                CONFIG_CURRENCY_VARIANTS,
+                default=options.get(CONFIG_CURRENCY_VARIANTS, CURRENCY_VARIANTS),
+            ): cv.multi_select(CURRENCY_VARIANTS),
+        }
+        for filter_type in FILTER_TYPES:
+            for option in [
+                CONFIG_DEADBAND_ABSOLUTE,
+                CONFIG_DEADBAND_RELATIVE,
+                CONFIG_MIN_PUBLISH_INTERVAL,
+            ]:
+                key = f"{filter_type}_{option}"
+                schema[vol.Required(key, default=options.get(key, 0))] = All(
+                    Coerce(float), Range(min=0)
+                )
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
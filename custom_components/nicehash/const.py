@@ -7,79 +7,180 @@ CONFIG_SECRET = "secret"
 CONFIG_ORG_ID = "org_id"
 CONFIG_FIAT = "fiat"
 CONFIG_UPDATE_INTERVAL = "update_interval"
+CONFIG_DEADBAND_ABSOLUTE = "deadband_absolute"
+CONFIG_DEADBAND_RELATIVE = "deadband_relative"
+CONFIG_MIN_PUBLISH_INTERVAL = "min_publish_interval"
+CONFIG_STALE_GRACE_PERIOD = "stale_grace_period"
+CONFIG_ELECTRICITY_PRICE_ENTITY = "electricity_price_entity"
+CONFIG_REMOVED_RIG_CYCLES = "removed_rig_cycles"
+CONFIG_RIG_NAME_PATTERN = "rig_name_pattern"
+CONFIG_RIG_GROUPS = "rig_groups"
+CONFIG_METRICS = "metrics"
+CONFIG_CURRENCY_VARIANTS = "currency_variants"
+CONFIG_POLICY_ENABLED = "policy_enabled"
+CONFIG_POLICY_MAX_TEMPERATURE = "policy_max_temperature"
+CONFIG_POLICY_TEMPERATURE_HYSTERESIS = "policy_temperature_hysteresis"
+CONFIG_POLICY_PROFIT_HYSTERESIS = "policy_profit_hysteresis"
+CONFIG_POLICY_COOLDOWN = "policy_cooldown"
 
 DOMAIN = "nicehash"
 PLATFORMS = ["sensor"]
 DEFAULT_SCAN_INTERVAL_MINUTES = 1
+DEFAULT_STALE_GRACE_PERIOD_MINUTES = 0
+DEFAULT_REMOVED_RIG_CYCLES = 60
+DEFAULT_POLICY_MAX_TEMPERATURE = 0
+DEFAULT_POLICY_TEMPERATURE_HYSTERESIS = 5
+DEFAULT_POLICY_PROFIT_HYSTERESIS = 10
+DEFAULT_POLICY_COOLDOWN_MINUTES = 15
 SWITCH_ASYNC_UPDATE_AFTER_SECONDS = 20
+SWITCH_OPTIMISTIC_TIMEOUT_SECONDS = 120
+TRANSITIONAL_REFRESH_SECONDS = 15
+TRANSITIONAL_MINER_STATUSES = ["BENCHMARKING", "PENDING"]
+BULK_MAX_CONCURRENT_REQUESTS = 4
+BULK_MIN_REQUEST_INTERVAL_SECONDS = 0.25
 
 NICEHASH_API_ENDPOINT = "https://api2.nicehash.com"
 
+STORAGE_VERSION = 1
+STORAGE_KEY_SNAPSHOT = DOMAIN + ".{}.snapshot"
+SNAPSHOT_SAVE_DELAY_SECONDS = 60
+STORAGE_KEY_PAYOUTS = DOMAIN + ".{}.payouts"
+STORAGE_KEY_ALGORITHMS = DOMAIN + ".{}.algorithms"
+
 SENSOR_DATA_COORDINATOR = "rig_sensor_coordinator"
 API = "api"
 UNSUB = "unsub"
 SENSORS = "sensors"
+SWITCHES = "switches"
+SWITCH_UNIQUE_IDS = "switch_unique_ids"
+CLEANER = "cleaner"
+SELECTION = "selection"
+ELECTRICITY_PRICE = "electricity_price"
+POLICY = "policy"
 
 ACCOUNT_OBJ = "account"
 RIGS_OBJ = "rigs"
+EXPECTED_OBJ = "expected"
+POWER_OBJ = "power"
+PAYOUTS_OBJ = "payouts"
+FLEET_OBJ = "fleet"
+TRENDS_OBJ = "trends"
 
-SERVICE_SET_POWER_MODE = "set_power_mode"
+MINER_STATUSES = [
+    "MINING",
+    "BENCHMARKING",
+    "PENDING",
+    "ERROR",
+    "STOPPED",
+    "DISABLED",
+    "OFFLINE",
+    # Spelled as the API does
+    "TRANSFERED",
+    "UNKNOWN",
+]
 
-ALGOS_UNITS = {
-    "SCRYPT": None,
-    "SHA256": None,
-    "SCRYPTNF": None,
-    "X11": None,
-    "X13": None,
-    "KECCAK": None,
-    "X15": None,
-    "NIST5": None,
-    "NEOSCRYPT": None,
-    "LYRA2RE": None,
-    "WHIRLPOOLX": None,
-    "QUBIT": None,
-    "QUARK": None,
-    "AXIOM": None,
-    "LYRA2REV2": None,
-    "SCRYPTJANENF16": None,
-    "BLAKE256R8": None,
-    "BLAKE256R14": None,
-    "BLAKE256R8VNL": None,
-    "HODL": None,
-    "DAGGERHASHIMOTO": "MH/s",
-    "DECRED": None,
-    "CRYPTONIGHT": None,
-    "LBRY": None,
-    "EQUIHASH": None,
-    "PASCAL": None,
-    "X11GOST": None,
-    "SIA": None,
-    "BLAKE2S": None,
-    "SKUNK": None,
-    "CRYPTONIGHTV7": None,
-    "CRYPTONIGHTHEAVY": None,
-    "LYRA2Z": None,
-    "X16R": None,
-    "CRYPTONIGHTV8": None,
-    "SHA256ASICBOOST": None,
-    "ZHASH": None,
-    "BEAM": None,
-    "GRINCUCKAROO29": "G/s",
-    "GRINCUCKATOO31": "G/s",
-    "LYRA2REV3": None,
-    "CRYPTONIGHTR": None,
-    "CUCKOOCYCLE": "G/s",
-    "GRINCUCKAROOD29": "G/s",
-    "BEAMV2": None,
-    "X16RV2": None,
-    "RANDOMXMONERO": "kH/s",
-    "EAGLESONG": None,
-    "CUCKAROOM": None,
-    "GRINCUCKATOO32": "G/s",
-    "HANDSHAKE": None,
-    "KAWPOW": "MH/s",
-    "CUCKAROO29BFC": None,
-    "BEAMV3": None,
-    "CUCKAROOZ29": None,
-    "OCTOPUS": "MH/s",
+# Fields of the API responses kept in the coordinator data, everything else is
+# dropped right after decoding. None keeps the whole value, a dict keeps the
+# listed fields of an object or of each object of a list.
+RIGS_FIELDS = {
+    "totalProfitability": None,
+    "totalProfitabilityLocal": None,
+    "unpaidAmount": None,
+    "miningRigs": {
+        "rigId": None,
+        "name": None,
+        "minerStatus": None,
+        "profitability": None,
+        "localProfitability": None,
+        "softwareVersions": None,
+        "groupName": None,
+        "stats": {
+            "algorithm": {"enumName": None},
+            "speedAccepted": None,
+            "speedRejectedTotal": None,
+        },
+        "devices": {
+            "id": None,
+            "name": None,
+            "status": {"enumName": None},
+            "temperature": None,
+            "load": None,
+            "revolutionsPerMinute": None,
+            "revolutionsPerMinutePercentage": None,
+            "powerUsage": None,
+            "powerMode": {"enumName": None},
+            "nhqm": None,
+            "speeds": {"algorithm": None, "speed": None, "displaySuffix": None},
+        },
+    },
+}
+ACCOUNT_FIELDS = {
+    "currencies": {"currency": None, "totalBalance": None, "fiatRate": None},
 }
+
+PAYING_RATES_UPDATE_INTERVAL_MINUTES = 10
+PAYOUTS_UPDATE_INTERVAL_MINUTES = 30
+ALGORITHMS_UPDATE_INTERVAL_HOURS = 24 * 7
+
+# Rolling statistics over the last refreshes
+TRENDS_WINDOW_SIZE = 60
+TRENDS_MIN_SAMPLES = 10
+TRENDS_ANOMALY_ZSCORE = 3
+PAYOUTS_PAGE_SIZE = 100
+
+SIGNAL_ELECTRICITY_PRICE_UPDATED = DOMAIN + "_electricity_price_updated_{}"
+SIGNAL_OPTIONS_UPDATED = DOMAIN + "_options_updated_{}"
+
+SERVICE_SET_POWER_MODE = "set_power_mode"
+
+# Unique id of the switch of a group, from the entry name and the group name
+GROUP_SWITCH_UNIQUE_ID = "nh-{}-group-{}-power"
+
+# Metrics which can be selected in the options, the sensor info types plus the
+# aggregated statuses and the switches
+METRICS = [
+    "totalBalance",
+    "fiatRate",
+    "unpaidAmount",
+    "totalProfitability",
+    "totalProfitabilityLocal",
+    "lastPayout",
+    "lastPayoutTime",
+    "payouts24h",
+    "payouts7d",
+    "payouts30d",
+    "totalPayouts",
+    "minerStatusCount",
+    "powerUsage",
+    "electricityCost",
+    "netProfitability",
+    "minerStatus",
+    "profitability",
+    "localProfitability",
+    "expectedProfitability",
+    "efficiency",
+    "speedAccepted",
+    "speedRejectedTotal",
+    "speedAcceptedMean",
+    "speedRejectedTotalMean",
+    "temperatureMean",
+    "powerUsageMean",
+    "anomalies",
+    "rigPower",
+    "devicePower",
+    "groupPower",
+]
+CURRENCY_BTC = "btc"
+CURRENCY_FIAT = "fiat"
+CURRENCY_VARIANTS = [CURRENCY_FIAT, CURRENCY_BTC]
+SERVICE_BULK_SET_STATUS = "bulk_set_status"
+SERVICE_BULK_SET_POWER_MODE = "bulk_set_power_mode"
+EVENT_BULK_RESULT = "nicehash_bulk_result"
+EVENT_STATUS_CHANGED = "nicehash_status_changed"
+EVENT_POLICY_DECISION = "nicehash_policy_decision"
+
+# Sensor types sharing one set of state filter options, the option keys are
+# built as "<filter type>_<CONFIG_DEADBAND_*|CONFIG_MIN_PUBLISH_INTERVAL>"
+FILTER_SPEED = "speed"
+FILTER_PROFITABILITY = "profitability"
+FILTER_TYPES = [FILTER_SPEED, FILTER_PROFITABILITY]
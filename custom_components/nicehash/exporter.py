@@ -0,0 +1,209 @@
+"""Standalone Prometheus exporter of the NiceHash rigs, without Home Assistant.
+
+Run it as a script with a JSON configuration file, it only imports the
+Home Assistant free const and nicehash modules next to it:
+
+    python custom_components/nicehash/exporter.py exporter.json
+
+{
+    "port": 9877,
+    "interval": 15,
+    "organisations": [
+        {"name": "farm", "org_id": "...", "key": "...", "secret": "..."}
+    ]
+}
+
+Every organisation is polled concurrently on its own client, /metrics is
+served from the last snapshot of each of them.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from time import time
+
+from aiohttp import web
+
+# Imported from the script directory, not through the integration package
+# whose __init__ needs Home Assistant
+from const import NICEHASH_API_ENDPOINT
+from nicehash import NiceHashPrivateAPI, normalize_value
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9877
+DEFAULT_INTERVAL_SECONDS = 15
+
+METRICS_HELP = {
+    "nicehash_up": "1 if the last poll of the organisation succeeded",
+    "nicehash_last_success_timestamp_seconds": "Time of the last successful poll",
+    "nicehash_poll_errors_total": "Number of failed polls",
+    "nicehash_unpaid_amount_btc": "Unpaid amount",
+    "nicehash_total_profitability_btc": "Profitability of all the rigs per day",
+    "nicehash_rig_status": "1 for the current miner status of the rig",
+    "nicehash_rig_profitability_btc": "Profitability of the rig per day",
+    "nicehash_rig_local_profitability_btc": "Local profitability of the rig per day",
+    "nicehash_rig_speed_accepted": "Accepted speed of the rig per algorithm",
+    "nicehash_rig_speed_rejected": "Rejected speed of the rig per algorithm",
+    "nicehash_device_temperature_celsius": "Temperature of the device",
+    "nicehash_device_power_watts": "Power usage of the device",
+    "nicehash_device_speed": "Speed of the device per algorithm",
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class NiceHashExporter:
+    """Poll the organisations and render their last snapshot."""
+
+    def __init__(self, organisations, interval=DEFAULT_INTERVAL_SECONDS):
+        """Init the exporter"""
+        self.interval = interval
+        self._apis = {
+            organisation["name"]: NiceHashPrivateAPI(
+                NICEHASH_API_ENDPOINT,
+                organisation["org_id"],
+                organisation["key"],
+                organisation["secret"],
+            )
+            for organisation in organisations
+        }
+        self._rigs = {}
+        self._up = {name: 0 for name in self._apis}
+        self._last_success = {}
+        self._errors = {name: 0 for name in self._apis}
+        self._rendered = None
+
+    async def async_poll(self, name):
+        """Poll an organisation forever"""
+        api = self._apis[name]
+        while True:
+            try:
+                self._rigs[name] = await asyncio.wait_for(
+                    api.get_rigs_data(), self.interval
+                )
+                self._up[name] = 1
+                self._last_success[name] = time()
+            except Exception as err:
+                _LOGGER.warning("Polling %s failed: %s", name, err)
+                self._up[name] = 0
+                self._errors[name] += 1
+            self._rendered = None
+            await asyncio.sleep(self.interval)
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text format"""
+        if self._rendered is not None:
+            return self._rendered
+        samples = {metric: [] for metric in METRICS_HELP}
+
+        def add(metric, labels, value):
+            if value is None:
+                return
+            label_text = ",".join(
+                f'{key}="{_escape(label)}"' for key, label in labels.items()
+            )
+            samples[metric].append(f"{metric}{{{label_text}}} {float(value)}")
+
+        for name in self._apis:
+            org = {"organisation": name}
+            add("nicehash_up", org, self._up[name])
+            add("nicehash_last_success_timestamp_seconds", org, self._last_success.get(name))
+            add("nicehash_poll_errors_total", org, self._errors[name])
+            rigs = self._rigs.get(name)
+            if rigs is None:
+                continue
+            add("nicehash_unpaid_amount_btc", org, rigs.get("unpaidAmount"))
+            add("nicehash_total_profitability_btc", org, rigs.get("totalProfitability"))
+            for rig in rigs.get("miningRigs", []):
+                rig_labels = {**org, "rig": rig.get("name"), "rig_id": rig.get("rigId")}
+                add(
+                    "nicehash_rig_status",
+                    {**rig_labels, "status": rig.get("minerStatus")},
+                    1,
+                )
+                add("nicehash_rig_profitability_btc", rig_labels, rig.get("profitability"))
+                add(
+                    "nicehash_rig_local_profitability_btc",
+                    rig_labels,
+                    rig.get("localProfitability"),
+                )
+                for stat in rig.get("stats", []):
+                    alg_labels = {
+                        **rig_labels,
+                        "algorithm": (stat.get("algorithm") or {}).get("enumName"),
+                    }
+                    add("nicehash_rig_speed_accepted", alg_labels, stat.get("speedAccepted"))
+                    add(
+                        "nicehash_rig_speed_rejected",
+                        alg_labels,
+                        stat.get("speedRejectedTotal"),
+                    )
+                for device in rig.get("devices", []):
+                    dev_labels = {
+                        **rig_labels,
+                        "device": device.get("name"),
+                        "device_id": device.get("id"),
+                    }
+                    add(
+                        "nicehash_device_temperature_celsius",
+                        dev_labels,
+                        normalize_value(device.get("temperature"))
+                        if device.get("temperature") is not None
+                        else None,
+                    )
+                    add("nicehash_device_power_watts", dev_labels, device.get("powerUsage"))
+                    for speed in device.get("speeds", []):
+                        add(
+                            "nicehash_device_speed",
+                            {
+                                **dev_labels,
+                                "algorithm": speed.get("algorithm"),
+                                "unit": speed.get("displaySuffix"),
+                            },
+                            speed.get("speed"),
+                        )
+
+        lines = []
+        for metric, metric_samples in samples.items():
+            lines.append(f"# HELP {metric} {METRICS_HELP[metric]}")
+            lines.append(f"# TYPE {metric} {'counter' if metric.endswith('_total') else 'gauge'}")
+            lines.extend(metric_samples)
+        self._rendered = "\n".join(lines) + "\n"
+        return self._rendered
+
+    async def async_handle_metrics(self, request):
+        """Serve /metrics"""
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def async_run(self, port=DEFAULT_PORT):
+        """Serve the metrics and poll the organisations until cancelled"""
+        app = web.Application()
+        app.router.add_get("/metrics", self.async_handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, port=port).start()
+        try:
+            await asyncio.gather(*[self.async_poll(name) for name in self._apis])
+        finally:
+            await runner.cleanup()
+
+
+def main():
+    """Run the exporter from a configuration file"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", help="JSON configuration file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config, encoding="utf-8") as config_file:
+        config = json.load(config_file)
+    exporter = NiceHashExporter(
+        config["organisations"], config.get("interval", DEFAULT_INTERVAL_SECONDS)
+    )
+    asyncio.run(exporter.async_run(config.get("port", DEFAULT_PORT)))
+
+
+if __name__ == "__main__":
+    main()
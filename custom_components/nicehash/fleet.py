@@ -0,0 +1,35 @@
+"""Fleet wide aggregates of the rigs."""
+from typing import Any, Dict
+
+from custom_components.nicehash.const import MINER_STATUSES
+
+
+def aggregate_fleet(rigs) -> Dict[str, Any]:
+    """Return the speeds per algorithm, the rig count per status and the groups.
+
+    Statuses not in MINER_STATUSES are counted as UNKNOWN so that the set of
+    aggregates, hence of entities, stays fixed. Each group lists its rigs and
+    their count per status.
+    """
+    statuses = {status: 0 for status in MINER_STATUSES}
+    algorithms = {}
+    groups = {}
+    for rig in rigs.get("miningRigs", []):
+        status = rig.get("minerStatus")
+        if rig.get("groupName"):
+            group = groups.setdefault(rig["groupName"], {"rigs": [], "statuses": {}})
+            group["rigs"].append(rig.get("rigId"))
+            group["statuses"][status] = group["statuses"].get(status, 0) + 1
+        if status not in statuses:
+            status = "UNKNOWN"
+        statuses[status] += 1
+        for stat in rig.get("stats", []):
+            alg = (stat.get("algorithm") or {}).get("enumName")
+            if alg is None:
+                continue
+            speeds = algorithms.setdefault(
+                alg, {"speedAccepted": 0, "speedRejectedTotal": 0}
+            )
+            speeds["speedAccepted"] += stat.get("speedAccepted") or 0
+            speeds["speedRejectedTotal"] += stat.get("speedRejectedTotal") or 0
+    return {"algorithms": algorithms, "statuses": statuses, "groups": groups}
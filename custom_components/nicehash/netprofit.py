@@ -0,0 +1,115 @@
+"""Power usage, electricity cost and net profit of the rigs."""
+from logging import getLogger
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_state_change_event
+
+from custom_components.nicehash.const import (
+    CONFIG_ELECTRICITY_PRICE_ENTITY,
+    SIGNAL_ELECTRICITY_PRICE_UPDATED,
+)
+
+_LOGGER = getLogger(__name__)
+
+
+def aggregate_power(rigs) -> Dict[str, Any]:
+    """Return the power usage in W of every rig and of the whole account.
+
+    Devices report a negative power usage when it is unknown, those are
+    ignored.
+    """
+    total = 0
+    per_rig = {}
+    for rig in rigs.get("miningRigs", []):
+        rig_power = 0
+        for device in rig.get("devices", []):
+            power = device.get("powerUsage") or 0
+            if power > 0:
+                rig_power += power
+        per_rig[rig.get("rigId")] = rig_power
+        total += rig_power
+    return {"total": total, "rigs": per_rig}
+
+
+def daily_cost(power: float, price: float) -> float:
+    """Return the daily cost of running power W at price per kWh."""
+    return power / 1000 * 24 * price
+
+
+def net_profit(power: float, profitability, price, fiat_rate) -> Dict[str, Any]:
+    """Return the daily electricity cost and net profit in BTC.
+
+    Both are None when the price or the conversion rate is unknown.
+    """
+    values = {"electricityCost": None, "netProfitability": None}
+    if price is None or not fiat_rate:
+        return values
+    cost = daily_cost(power, price) / fiat_rate
+    values["electricityCost"] = cost
+    if profitability is not None:
+        values["netProfitability"] = float(profitability) - cost
+    return values
+
+
+class NiceHashElectricityPrice:
+    """Track the electricity price entity selected in the options.
+
+    The price is expected in the fiat currency of the entry, per kWh. Each
+    change is signalled to the cost sensors so that no API call is needed.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._config_entry = config_entry
+        self.entity_id = None
+        self.price = None
+        self._unsub = None
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when the price changes."""
+        return SIGNAL_ELECTRICITY_PRICE_UPDATED.format(self._config_entry.entry_id)
+
+    @callback
+    def async_start(self) -> None:
+        """Start tracking the entity configured in the options."""
+        self.async_stop()
+        self.entity_id = (
+            self._config_entry.options.get(CONFIG_ELECTRICITY_PRICE_ENTITY) or None
+        )
+        if self.entity_id is None:
+            self.price = None
+            return
+        self._set_price(self._hass.states.get(self.entity_id))
+        self._unsub = async_track_state_change_event(
+            self._hass, [self.entity_id], self._handle_state_change
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop tracking the price entity."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _handle_state_change(self, event) -> None:
+        self._set_price(event.data.get("new_state"))
+        async_dispatcher_send(self._hass, self.signal)
+
+    def _set_price(self, state) -> None:
+        self.price = None
+        if state is None:
+            return
+        try:
+            self.price = float(state.state)
+        except ValueError:
+            _LOGGER.debug(
+                "Ignoring non numeric electricity price '%s' from %s",
+                state.state,
+                self.entity_id,
+            )
@@ -1,25 +1,334 @@
 """ Implementation of the NiceHash API """
 
+import asyncio
+from collections import OrderedDict
 from datetime import datetime
-from time import mktime
+from heapq import heappop, heappush
+from itertools import count
+from time import mktime, monotonic
 import uuid
 import hmac
 import json
 from hashlib import sha256
 import aiohttp
 
+PRIORITY_COMMAND = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+
+
+def normalize_value(value: int) -> int:
+    """Return a device value without the flags NiceHash packs in its high bits."""
+    if 0 >= value <= 500:
+        return value
+    return value % 65536
+
+
+class NiceHashRequestScheduler:
+    """ Run the API requests by priority with a bounded concurrency
+
+    Queued requests are started lowest priority value first, so commands go
+    ahead of the queued polls. A queued request superseded by a newer one with
+    the same key is dropped, the callers of both get the result of the new
+    one.
+    """
+
+    def __init__(self, max_concurrent=4):
+        """Init the scheduler"""
+        self._max_concurrent = max_concurrent
+        self._running = 0
+        self._queue = []
+        self._queued_by_key = {}
+        self._sequence = count()
+
+    async def submit(self, priority, key, request):
+        """Queue request, a coroutine function, and return its result"""
+        future = asyncio.get_running_loop().create_future()
+        futures = [future]
+        superseded = self._queued_by_key.pop(key, None) if key is not None else None
+        if superseded is not None:
+            superseded["cancelled"] = True
+            futures = superseded["futures"] + futures
+            priority = min(priority, superseded["priority"])
+        entry = {
+            "request": request,
+            "futures": futures,
+            "priority": priority,
+            "key": key,
+            "cancelled": False,
+        }
+        if key is not None:
+            self._queued_by_key[key] = entry
+        heappush(self._queue, (priority, next(self._sequence), entry))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        while self._running < self._max_concurrent and self._queue:
+            entry = heappop(self._queue)[2]
+            if entry["cancelled"]:
+                continue
+            if entry["key"] is not None:
+                self._queued_by_key.pop(entry["key"], None)
+            self._running += 1
+            asyncio.ensure_future(self._run(entry))
+
+    async def _run(self, entry):
+        try:
+            result = await entry["request"]()
+        except Exception as err:
+            for future in entry["futures"]:
+                if not future.done():
+                    future.set_exception(err)
+        else:
+            for future in entry["futures"]:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+
+class NiceHashCommandSuperseded(Exception):
+    """ A pending command was replaced by a newer one with another intent """
+
+
+class NiceHashCommandQueue:
+    """ Serialise the commands sent to each rig
+
+    A command still pending when a new one of the same kind targets the same
+    rig or device is dropped, the callers of both get the result of the new
+    one. A caller whose intent (e.g. the START or STOP action) differs from
+    the one of the command actually sent gets NiceHashCommandSuperseded
+    instead, the result does not acknowledge its own command.
+    """
+
+    def __init__(self):
+        """Init the queue"""
+        # rig id -> (device id, kind) -> (command factory, intent, futures)
+        self._pending = {}
+        self._workers = {}
+
+    def depth(self, rig_id=None):
+        """Return the number of pending commands, for one rig or all of them"""
+        if rig_id is not None:
+            return len(self._pending.get(rig_id, {}))
+        return sum(len(pending) for pending in self._pending.values())
+
+    async def submit(self, rig_id, device_id, kind, command, intent=None):
+        """Queue command, a coroutine function, and return its result"""
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(rig_id, OrderedDict())
+        futures = []
+        if (device_id, kind) in pending:
+            futures = pending.pop((device_id, kind))[2]
+        futures.append((future, intent))
+        pending[(device_id, kind)] = (command, intent, futures)
+        if rig_id not in self._workers:
+            self._workers[rig_id] = asyncio.ensure_future(self._run(rig_id))
+        return await future
+
+    async def _run(self, rig_id):
+        pending = self._pending[rig_id]
+        try:
+            while pending:
+                command, sent_intent, futures = pending.pop(next(iter(pending)))
+                try:
+                    result = await command()
+                except Exception as err:
+                    for future, _ in futures:
+                        if not future.done():
+                            future.set_exception(err)
+                else:
+                    for future, intent in futures:
+                        if future.done():
+                            continue
+                        if intent != sent_intent:
+                            future.set_exception(
+                                NiceHashCommandSuperseded(
+                                    f"Superseded by {sent_intent}: {result}"
+                                )
+                            )
+                        else:
+                            future.set_result(result)
+        finally:
+            del self._workers[rig_id]
+            if not pending:
+                del self._pending[rig_id]
+
+
+class NiceHashCassette:
+    """ Record the API exchanges to a file or serve them back without network
+
+    Each exchange is one compact JSON line holding the request (method, path,
+    query and body), its duration, and the response or the error. The values
+    given in redact (key, secret, organisation id) are replaced before
+    writing and the signing headers are never recorded.
+
+    On replay an exchange is matched on method, path, query and body, then on
+    method and path alone, and served after its recorded duration divided by
+    speed (0 to answer at once). The exchanges of a request are served in the
+    recorded order, starting over once they have all been served.
+
+    The file is only read and written in the executor, never on the loop.
+    """
+
+    def __init__(self, path, mode=CASSETTE_RECORD, speed=1.0, redact=()):
+        """Init the cassette, loaded on the first replayed request"""
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._redact = [value for value in redact if value]
+        self._exchanges = None
+        self._served = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _keys(exchange):
+        return [
+            json.dumps(
+                [exchange["method"], exchange["path"], exchange["query"], exchange["body"]],
+                sort_keys=True,
+            ),
+            json.dumps([exchange["method"], exchange["path"]]),
+        ]
+
+    async def play(self, method, path, query, query2, body, request):
+        """Record request, a coroutine function, or replay its recorded result"""
+        exchange = {
+            "method": method,
+            "path": path,
+            "query": [query, sorted((query2 or {}).items())],
+            "body": body,
+        }
+        if self.mode == CASSETTE_REPLAY:
+            return await self._replay(exchange)
+
+        start = monotonic()
+        try:
+            result = await request()
+        except Exception as err:
+            exchange["error"] = str(err)
+            raise
+        else:
+            exchange["response"] = result
+            return result
+        finally:
+            # A cancelled request has neither, there is nothing to replay
+            if "response" in exchange or "error" in exchange:
+                exchange["duration"] = round(monotonic() - start, 3)
+                # Appends are serialized for the lines not to interleave
+                async with self._lock:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._write, exchange
+                    )
+
+    async def _replay(self, exchange):
+        async with self._lock:
+            if self._exchanges is None:
+                self._exchanges = await asyncio.get_running_loop().run_in_executor(
+                    None, self._load
+                )
+        for key in self._keys(json.loads(json.dumps(exchange))):
+            if key in self._exchanges:
+                break
+        else:
+            raise Exception(
+                "No recorded exchange for " + exchange["method"] + " " + exchange["path"]
+            )
+        exchanges = self._exchanges[key]
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        recorded = exchanges[served % len(exchanges)]
+        if self.speed:
+            await asyncio.sleep(recorded["duration"] / self.speed)
+        if "error" in recorded:
+            raise Exception(recorded["error"])
+        return recorded["response"]
+
+    def _load(self):
+        exchanges = {}
+        with open(self.path, encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    exchange = json.loads(line)
+                    for key in self._keys(exchange):
+                        exchanges.setdefault(key, []).append(exchange)
+        return exchanges
+
+    def _write(self, exchange):
+        line = json.dumps(exchange, separators=(",", ":"))
+        for value in self._redact:
+            line = line.replace(value, "REDACTED")
+        with open(self.path, "a", encoding="utf-8") as cassette:
+            cassette.write(line + "\n")
+
+
 class NiceHashPrivateAPI:
     """ Implementation of the API calls """
 
-    def __init__(self, host, organisation_id, key, secret, verbose=False):
+    def __init__(
+        self,
+        host,
+        organisation_id,
+        key,
+        secret,
+        verbose=False,
+        cassette_path=None,
+        cassette_mode=CASSETTE_RECORD,
+        cassette_speed=1.0,
+    ):
         """Init the API"""
         self.key = key
         self.secret = secret
         self.organisation_id = organisation_id
         self.host = host
         self.verbose = verbose
+        self.commands = NiceHashCommandQueue()
+        self.scheduler = NiceHashRequestScheduler()
+        self.cassette = None
+        if cassette_path is not None:
+            self.cassette = NiceHashCassette(
+                cassette_path,
+                cassette_mode,
+                cassette_speed,
+                (key, secret, organisation_id),
+            )
 
-    async def request(self, method, path, query="", query2=None, body=None):
+    async def request(
+        self,
+        method,
+        path,
+        query="",
+        query2=None,
+        body=None,
+        priority=PRIORITY_INTERACTIVE,
+        key=None,
+    ):
+        """NiceHash API Request, scheduled by priority"""
+        return await self.scheduler.submit(
+            priority,
+            key,
+            lambda: self._send(method, path, query, query2, body),
+        )
+
+    async def _send(self, method, path, query, query2, body):
+        """NiceHash API Request, through the cassette if any"""
+        if self.cassette is None:
+            return await self._request(method, path, query, query2, body)
+        return await self.cassette.play(
+            method,
+            path,
+            query,
+            query2,
+            body,
+            lambda: self._request(method, path, query, query2, body),
+        )
+
+    async def _request(self, method, path, query="", query2=None, body=None):
         """NiceHash API Request"""
 
         xtime = self.get_epoch_ms_from_now()
@@ -99,7 +408,21 @@ class NiceHashPrivateAPI:
 
     async def get_rigs_data(self):
         """Return the rigs object"""
-        return await self.request("GET", "/main/api/v2/mining/rigs2")
+        return await self.request(
+            "GET",
+            "/main/api/v2/mining/rigs2",
+            priority=PRIORITY_BACKGROUND,
+            key="rigs2",
+        )
+
+    async def get_rig_data(self, rig_id: str):
+        """Return a single rig object"""
+        return await self.request(
+            "GET",
+            f"/main/api/v2/mining/rig2/{rig_id}",
+            priority=PRIORITY_BACKGROUND,
+            key=f"rig2/{rig_id}",
+        )
 
     async def get_account_data(self, fiat="USD"):
         """Return the account object"""
@@ -108,49 +431,143 @@ class NiceHashPrivateAPI:
             "/main/api/v2/accounting/accounts2",
             "fiat={}".format(fiat),
             {"fiat": fiat},
+            priority=PRIORITY_BACKGROUND,
+            key=f"accounts2/{fiat}",
+        )
+
+    async def get_payouts(self, after_timestamp: int = 0, page: int = 0, size: int = 100):
+        """Return a page of the mining payouts created after a timestamp in ms"""
+        query = {"afterTimestamp": after_timestamp, "page": page, "size": size}
+        return await self.request(
+            "GET",
+            "/main/api/v2/mining/rigs/payouts",
+            "&".join(f"{key}={value}" for key, value in query.items()),
+            query,
+            priority=PRIORITY_BACKGROUND,
+        )
+
+    async def get_paying_rates(self):
+        """Return the current paying rate of each algorithm"""
+        return await self.request(
+            "GET",
+            "/main/api/v2/public/simplemultialgo/info",
+            priority=PRIORITY_BACKGROUND,
+            key="simplemultialgo",
+        )
+
+    async def get_algorithms(self):
+        """Return the mining algorithms metadata"""
+        return await self.request(
+            "GET",
+            "/main/api/v2/mining/algorithms",
+            priority=PRIORITY_BACKGROUND,
+            key="algorithms",
         )
 
     async def set_rig_status(self, rig_id: str, status: bool):
         """Set a rig status"""
         action = "START" if status else "STOP"
-        return await self.request(
-            "POST",
-            "/main/api/v2/mining/rigs/status2",
-            "",
+        return await self.commands.submit(
+            rig_id,
             None,
-            {"rigId": rig_id, "action": action},
+            "status",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"rigId": rig_id, "action": action},
+                priority=PRIORITY_COMMAND,
+            ),
+            action,
         )
 
     async def set_device_status(self, rig_id: str, device_id: str, status: bool):
         """Set a device status"""
         action = "START" if status else "STOP"
-        return await self.request(
-            "POST",
-            "/main/api/v2/mining/rigs/status2",
-            "",
+        return await self.commands.submit(
+            rig_id,
+            device_id,
+            "status",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"rigId": rig_id, "deviceId": device_id, "action": action},
+                priority=PRIORITY_COMMAND,
+            ),
+            action,
+        )
+
+    async def set_group_status(self, group_name: str, status: bool):
+        """Set the status of all the rigs of a group"""
+        action = "START" if status else "STOP"
+        return await self.commands.submit(
+            f"group:{group_name}",
+            None,
+            "status",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"groupName": group_name, "action": action},
+                priority=PRIORITY_COMMAND,
+            ),
+            action,
+        )
+
+    async def set_group_power_mode(self, group_name: str, power_mode: str):
+        """Set the power mode of all the devices of a group"""
+        return await self.commands.submit(
+            f"group:{group_name}",
             None,
-            {"rigId": rig_id, "deviceId": device_id, "action": action},
+            "power_mode",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"groupName": group_name, "action": "POWER_MODE", "options": [power_mode]},
+                priority=PRIORITY_COMMAND,
+            ),
+            power_mode,
         )
 
     async def set_power_mode(self, rig_id: str, device_id: str, power_mode: str):
         """Set a device status"""
-        return await self.request(
-            "POST",
-            "/main/api/v2/mining/rigs/status2",
-            "",
-            None,
-            {"rigId": rig_id, "deviceId": device_id, "action": "POWER_MODE", "options": [power_mode]},
+        return await self.commands.submit(
+            rig_id,
+            device_id,
+            "power_mode",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"rigId": rig_id, "deviceId": device_id, "action": "POWER_MODE", "options": [power_mode]},
+                priority=PRIORITY_COMMAND,
+            ),
+            power_mode,
         )
 
     async def set_power_mode_nhqm(self, rig_id: str, device_id: str, nhqm_ver: str, nhqm_op: str):
         """Set a device status"""
 
-        return await self.request(
-            "POST",
-            "/main/api/v2/mining/rigs/status2",
-            "",
-            None,
-            {"rigId": rig_id, "deviceId": device_id, "action": "NHQM_SET", "options": [f"V={nhqm_ver};OP={nhqm_op};"]},
+        return await self.commands.submit(
+            rig_id,
+            device_id,
+            "power_mode",
+            lambda: self.request(
+                "POST",
+                "/main/api/v2/mining/rigs/status2",
+                "",
+                None,
+                {"rigId": rig_id, "deviceId": device_id, "action": "NHQM_SET", "options": [f"V={nhqm_ver};OP={nhqm_op};"]},
+                priority=PRIORITY_COMMAND,
+            ),
+            nhqm_op,
         )
 
     def get_epoch_ms_from_now(self):
@@ -0,0 +1,140 @@
+"""Incremental synchronisation of the mining payouts history."""
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from typing import Any, Dict
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from custom_components.nicehash.nicehash import NiceHashPrivateAPI
+from custom_components.nicehash.const import (
+    PAYOUTS_PAGE_SIZE,
+    PAYOUTS_UPDATE_INTERVAL_MINUTES,
+)
+
+_LOGGER = getLogger(__name__)
+
+PAYOUT_PERIODS = {
+    "payouts24h": timedelta(days=1),
+    "payouts7d": timedelta(days=7),
+    "payouts30d": timedelta(days=30),
+}
+
+
+class NiceHashPayouts:
+    """Local cache of the mining payouts, amounts net of fees.
+
+    Only the payouts created after the newest cached one are fetched, page by
+    page, every PAYOUTS_UPDATE_INTERVAL_MINUTES. The cache is persisted and the
+    summaries are computed from it.
+    """
+
+    def __init__(self, api: NiceHashPrivateAPI, store: Store) -> None:
+        """Initialize."""
+        self._api = api
+        self._store = store
+        self._loaded = False
+        self._syncing = False
+        self._synced_at = None
+        self._update_interval = timedelta(minutes=PAYOUTS_UPDATE_INTERVAL_MINUTES)
+        # Sorted by creation time, as (created timestamp in ms, id, amount)
+        self._payouts = []
+        self._ids = set()
+        self._total = 0
+
+    @property
+    def cursor(self) -> int:
+        """Return the creation timestamp in ms of the newest cached payout."""
+        return self._payouts[-1][0] if self._payouts else 0
+
+    async def async_load(self) -> None:
+        """Load the persisted payouts."""
+        stored = await self._store.async_load()
+        self._loaded = True
+        if stored:
+            self._add(stored.get("payouts", []))
+
+    def _add(self, payouts) -> bool:
+        added = False
+        for created, payout_id, amount in payouts:
+            if payout_id in self._ids:
+                continue
+            self._ids.add(payout_id)
+            self._payouts.append((created, payout_id, amount))
+            self._total += amount
+            added = True
+        if added:
+            self._payouts.sort()
+        return added
+
+    async def async_sync(self) -> None:
+        """Fetch the new payouts if the last synchronisation expired."""
+        now = dt_util.utcnow()
+        if self._syncing:
+            return
+        if self._synced_at is not None and now - self._synced_at < self._update_interval:
+            return
+        self._syncing = True
+        try:
+            await self._async_sync(now)
+        finally:
+            self._syncing = False
+
+    async def _async_sync(self, now) -> None:
+        if not self._loaded:
+            await self.async_load()
+
+        cursor = self.cursor
+        new_payouts = []
+        page = 0
+        try:
+            while True:
+                response = await self._api.get_payouts(cursor, page, PAYOUTS_PAGE_SIZE)
+                for payout in response.get("list", []):
+                    new_payouts.append(
+                        (
+                            int(payout.get("created")),
+                            payout.get("id"),
+                            float(payout.get("amount", 0))
+                            - float(payout.get("feeAmount", 0) or 0),
+                        )
+                    )
+                page += 1
+                if page >= response.get("pagination", {}).get("totalPageCount", 0):
+                    break
+        except Exception as err:
+            # The pages are not in creation order, a partial result would move
+            # the cursor past payouts not fetched yet.
+            _LOGGER.warning("Failed to synchronise the payouts: %s", err)
+            return
+
+        if self._add(new_payouts):
+            self._store.async_delay_save(
+                lambda: {"payouts": [list(payout) for payout in self._payouts]}, 10
+            )
+        self._synced_at = now
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the last payout, the payouts of recent periods and the total."""
+        summary = {
+            "lastPayout": None,
+            "lastPayoutTime": None,
+            "totalPayouts": self._total,
+        }
+        if self._payouts:
+            created, _, amount = self._payouts[-1]
+            summary["lastPayout"] = amount
+            summary["lastPayoutTime"] = datetime.fromtimestamp(
+                created / 1000, timezone.utc
+            ).isoformat()
+
+        now_ms = dt_util.utcnow().timestamp() * 1000
+        for key, period in PAYOUT_PERIODS.items():
+            since = now_ms - period.total_seconds() * 1000
+            total = 0
+            for created, _, amount in reversed(self._payouts):
+                if created < since:
+                    break
+                total += amount
+            summary[key] = total
+        return summary
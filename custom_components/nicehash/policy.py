@@ -0,0 +1,222 @@
+"""Policy stopping and restarting devices on net profit and temperature."""
+import asyncio
+from datetime import timedelta
+from logging import getLogger
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from custom_components.nicehash.common import (
+    NiceHashRequestLimiter,
+    NiceHashSensorDataUpdateCoordinator,
+    normalize_value,
+)
+from custom_components.nicehash.const import (
+    ACCOUNT_OBJ,
+    BULK_MAX_CONCURRENT_REQUESTS,
+    BULK_MIN_REQUEST_INTERVAL_SECONDS,
+    CONFIG_POLICY_COOLDOWN,
+    CONFIG_POLICY_ENABLED,
+    CONFIG_POLICY_MAX_TEMPERATURE,
+    CONFIG_POLICY_PROFIT_HYSTERESIS,
+    CONFIG_POLICY_TEMPERATURE_HYSTERESIS,
+    DEFAULT_POLICY_COOLDOWN_MINUTES,
+    DEFAULT_POLICY_MAX_TEMPERATURE,
+    DEFAULT_POLICY_PROFIT_HYSTERESIS,
+    DEFAULT_POLICY_TEMPERATURE_HYSTERESIS,
+    EVENT_POLICY_DECISION,
+    RIGS_OBJ,
+)
+from custom_components.nicehash.netprofit import NiceHashElectricityPrice, daily_cost
+from custom_components.nicehash.nicehash import NiceHashPrivateAPI
+
+_LOGGER = getLogger(__name__)
+
+REASON_TEMPERATURE = "temperature"
+REASON_NET_PROFIT = "net_profit"
+RUNNING_STATUSES = ["BENCHMARKING", "MINING"]
+
+
+class NiceHashPolicyEngine:
+    """Stop devices losing money or running too hot, restart them on recovery.
+
+    The rules are evaluated on every successful refresh from the coordinator
+    data only. A device is only restarted if the policy stopped it, and once
+    its last reason to be stopped cleared with the hysteresis margin. No
+    device is acted on twice within the cooldown.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        api: NiceHashPrivateAPI,
+        coordinator: NiceHashSensorDataUpdateCoordinator,
+        price: NiceHashElectricityPrice,
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._config_entry = config_entry
+        self._api = api
+        self._coordinator = coordinator
+        self._price = price
+        self._limiter = NiceHashRequestLimiter(
+            BULK_MAX_CONCURRENT_REQUESTS, BULK_MIN_REQUEST_INTERVAL_SECONDS
+        )
+        # (rig id, device id) -> reasons, speeds and power when stopped
+        self._stopped = {}
+        # (rig id, device id) -> time of the last command
+        self._last_action = {}
+
+    def _option(self, key, default):
+        return self._config_entry.options.get(key, default)
+
+    @callback
+    def async_evaluate(self) -> None:
+        """Evaluate the policy against the coordinator data."""
+        if not self._option(CONFIG_POLICY_ENABLED, False):
+            return
+        if not self._coordinator.last_update_success or self._coordinator.data is None:
+            return
+
+        now = dt_util.utcnow()
+        cooldown = timedelta(
+            minutes=self._option(CONFIG_POLICY_COOLDOWN, DEFAULT_POLICY_COOLDOWN_MINUTES)
+        )
+        decisions = []
+        for rig in self._coordinator.data[RIGS_OBJ].get("miningRigs", []):
+            for device in rig.get("devices", []):
+                key = (rig.get("rigId"), device.get("id"))
+                last_action = self._last_action.get(key)
+                if last_action is not None and now - last_action < cooldown:
+                    continue
+                decision = self._evaluate_device(key, device)
+                if decision is not None:
+                    self._last_action[key] = now
+                    decisions.append((rig, device, *decision))
+
+        if decisions:
+            self._hass.async_create_task(self._async_apply(decisions))
+
+    def _evaluate_device(self, key, device):
+        """Return the action and reasons for a device, None to leave it be."""
+        running = device.get("status", {}).get("enumName") in RUNNING_STATUSES
+        temperature = device.get("temperature")
+        if temperature is not None:
+            temperature = normalize_value(temperature)
+        max_temperature = self._option(
+            CONFIG_POLICY_MAX_TEMPERATURE, DEFAULT_POLICY_MAX_TEMPERATURE
+        )
+
+        if running:
+            # Restarted by someone else, the policy no longer owns the device
+            self._stopped.pop(key, None)
+            reasons = []
+            if max_temperature and temperature is not None and temperature > max_temperature:
+                reasons.append(REASON_TEMPERATURE)
+            margin = self._net_profit_margin(
+                device.get("speeds", []), device.get("powerUsage")
+            )
+            if margin is not None and margin < 0:
+                reasons.append(REASON_NET_PROFIT)
+            if not reasons:
+                return None
+            self._stopped[key] = {
+                "reasons": set(reasons),
+                "speeds": device.get("speeds", []),
+                "power": device.get("powerUsage"),
+            }
+            return False, reasons
+
+        stopped = self._stopped.get(key)
+        if stopped is None:
+            return None
+        reasons = stopped["reasons"]
+        if REASON_TEMPERATURE in reasons:
+            hysteresis = self._option(
+                CONFIG_POLICY_TEMPERATURE_HYSTERESIS,
+                DEFAULT_POLICY_TEMPERATURE_HYSTERESIS,
+            )
+            if (
+                not max_temperature
+                or temperature is None
+                or temperature < max_temperature - hysteresis
+            ):
+                reasons.discard(REASON_TEMPERATURE)
+        if REASON_NET_PROFIT in reasons:
+            # The device does not report speeds while stopped, the ones it
+            # had when stopped are priced at the current rates instead.
+            if self._coordinator.profitability.price_speeds(stopped["speeds"]) is None:
+                # No rate to price them, no decision until there is one
+                return None
+            margin = self._net_profit_margin(stopped["speeds"], stopped["power"])
+            hysteresis = self._option(
+                CONFIG_POLICY_PROFIT_HYSTERESIS, DEFAULT_POLICY_PROFIT_HYSTERESIS
+            )
+            if margin is None or margin > hysteresis:
+                reasons.discard(REASON_NET_PROFIT)
+        if reasons:
+            return None
+        # Kept until the START is acknowledged, so that a failed one is retried
+        return True, []
+
+    def _net_profit_margin(self, speeds, power):
+        """Return the expected net profit as a percentage of the electricity cost.
+
+        None when it can't be computed, including when the paying rates are
+        missing or one of the algorithms has none.
+        """
+        price = self._price.price
+        if price is None or not power or power <= 0:
+            return None
+        revenue = self._coordinator.profitability.price_speeds(speeds)
+        if revenue is None:
+            return None
+        fiat_rate = self._coordinator.data[ACCOUNT_OBJ]["currencies"][0].get(
+            "fiatRate", 0
+        )
+        if not fiat_rate:
+            return None
+        cost = daily_cost(power, price) / fiat_rate
+        if not cost:
+            return None
+        return (revenue - cost) * 100 / cost
+
+    async def _async_apply(self, decisions) -> None:
+        """Send the status commands and report each decision as an event."""
+
+        async def _apply(rig, device, status, reasons):
+            try:
+                response = await self._limiter.run(
+                    self._api.set_device_status(
+                        rig.get("rigId"), device.get("id"), status
+                    )
+                )
+            except Exception as err:
+                response = err
+            success = isinstance(response, dict) and bool(response.get("success"))
+            if not success:
+                _LOGGER.error(
+                    "Policy failed to %s device '%s' of rig '%s': %s",
+                    "start" if status else "stop",
+                    device.get("name"),
+                    rig.get("name"),
+                    response,
+                )
+            elif status:
+                self._stopped.pop((rig.get("rigId"), device.get("id")), None)
+            self._hass.bus.async_fire(
+                EVENT_POLICY_DECISION,
+                {
+                    "rig_id": rig.get("rigId"),
+                    "rig_name": rig.get("name"),
+                    "device_id": device.get("id"),
+                    "device_name": device.get("name"),
+                    "action": "START" if status else "STOP",
+                    "reasons": reasons,
+                    "success": success,
+                },
+            )
+
+        await asyncio.gather(*[_apply(*decision) for decision in decisions])
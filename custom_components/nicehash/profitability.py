@@ -0,0 +1,96 @@
+"""Expected profitability of the rigs and devices from the market paying rates."""
+from datetime import timedelta
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.nicehash.algorithms import NiceHashAlgorithms
+from custom_components.nicehash.nicehash import NiceHashPrivateAPI
+from custom_components.nicehash.const import PAYING_RATES_UPDATE_INTERVAL_MINUTES
+
+_LOGGER = getLogger(__name__)
+
+class NiceHashProfitabilityEngine:
+    """Compute the expected profitability from the public paying rates.
+
+    The paying rates are in BTC per market factor unit and per day, they are
+    cached and only fetched again every PAYING_RATES_UPDATE_INTERVAL_MINUTES.
+    """
+
+    def __init__(self, api: NiceHashPrivateAPI, algorithms: NiceHashAlgorithms) -> None:
+        """Initialize."""
+        self._api = api
+        self._algorithms = algorithms
+        self._rates = {}
+        self._updated_at = None
+        self._update_interval = timedelta(minutes=PAYING_RATES_UPDATE_INTERVAL_MINUTES)
+
+    async def async_update_rates(self) -> None:
+        """Fetch the paying rates if the cached ones expired."""
+        now = dt_util.utcnow()
+        if self._updated_at is not None and now - self._updated_at < self._update_interval:
+            return
+        try:
+            paying = await self._api.get_paying_rates()
+        except Exception as err:
+            _LOGGER.warning("Failed to update the paying rates: %s", err)
+            return
+
+        # Without metadata the unit of a rate is unknown, it is left unpriced
+        rates = {}
+        for algo in paying.get("miningAlgorithms", []):
+            market_factor = self._algorithms.market_factor(algo.get("algorithm"))
+            if market_factor and algo.get("paying") is not None:
+                rates[algo.get("algorithm")] = float(algo.get("paying")) / market_factor
+        self._rates = rates
+        self._updated_at = now
+
+    def price_speeds(self, speeds) -> Optional[float]:
+        """Return the expected BTC per day of a device mining at these speeds.
+
+        The displayed speeds are scaled to units per second with the mining
+        factor of their algorithm. None when an algorithm has no paying rate
+        or no mining factor, or when no paying rates were fetched yet, rather
+        than pricing it at 0.
+        """
+        rates = self._rates
+        if not rates:
+            return None
+        total = 0
+        for speed in speeds:
+            algorithm = speed.get("algorithm")
+            rate = rates.get(algorithm)
+            mining_factor = self._algorithms.mining_factor(algorithm)
+            if rate is None or mining_factor is None:
+                return None
+            total += float(speed.get("speed", 0) or 0) * mining_factor * rate
+        return total
+
+    def compute(self, rigs) -> Dict[str, Any]:
+        """Return the expected profitability of every rig and device.
+
+        The whole fleet is priced in a single pass over the device speeds.
+        """
+        expected = {}
+        for rig in rigs.get("miningRigs", []):
+            devices = {}
+            rig_total = 0
+            for device in rig.get("devices", []):
+                device_total = self.price_speeds(device.get("speeds", []))
+                devices[device.get("id")] = {"expectedProfitability": device_total}
+                if device_total is None or rig_total is None:
+                    rig_total = None
+                else:
+                    rig_total += device_total
+
+            efficiency = None
+            actual = rig.get("profitability")
+            if actual is not None and rig_total:
+                efficiency = round(float(actual) * 100 / rig_total, 1)
+            expected[rig.get("rigId")] = {
+                "expectedProfitability": rig_total,
+                "efficiency": efficiency,
+                "devices": devices,
+            }
+        return expected
@@ -6,19 +6,35 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import Entity
 from homeassistant.core import callback
 
-# from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import HomeAssistantType
 
-from custom_components.nicehash.common import NiceHashSensorDataUpdateCoordinator
+from custom_components.nicehash.netprofit import NiceHashElectricityPrice, net_profit
+from custom_components.nicehash.common import (
+    NiceHashCoordinatorEntity,
+    NiceHashSensorDataUpdateCoordinator,
+    NiceHashStateFilter,
+    cached_property,
+    generation_cached_property,
+)
 from custom_components.nicehash.const import (
     ACCOUNT_OBJ,
-    ALGOS_UNITS,
     DOMAIN,
+    ELECTRICITY_PRICE,
+    EXPECTED_OBJ,
+    FILTER_PROFITABILITY,
+    FLEET_OBJ,
+    FILTER_SPEED,
+    MINER_STATUSES,
+    PAYOUTS_OBJ,
+    POWER_OBJ,
     RIGS_OBJ,
+    SELECTION,
     SENSOR_DATA_COORDINATOR,
+    SENSORS,
+    SIGNAL_OPTIONS_UPDATED,
+    TRENDS_OBJ,
     UNSUB,
 )
 
@@ -27,18 +43,72 @@ _LOGGER = logging.getLogger(__name__)
 PLATFORM = "sensor"
 GLOBAL_ATTRIBUTES = [
     {"unpaidAmount": {"unit": "BTC"}},
-    {"totalProfitability": {"unit": "BTC"}},
-    {"totalProfitabilityLocal": {"unit": "BTC"}},
+    {"totalProfitability": {"unit": "BTC", "filter": FILTER_PROFITABILITY}},
+    {"totalProfitabilityLocal": {"unit": "BTC", "filter": FILTER_PROFITABILITY}},
 ]
 RIG_DATA_ATTRIBUTES = [
-    {"localProfitability": {"numerical": True, "unit": "BTC"}},
-    {"profitability": {"numerical": True, "unit": "BTC"}},
+    {
+        "localProfitability": {
+            "numerical": True,
+            "unit": "BTC",
+            "filter": FILTER_PROFITABILITY,
+        }
+    },
+    {"profitability": {"numerical": True, "unit": "BTC", "filter": FILTER_PROFITABILITY}},
 ]
 RIG_DATA_ATTRIBUTES_NON_BTC = [
     {"minerStatus": {"numerical": False, "unit": None}},
 ]
 
-RIG_STATS_ATTRIBUTES = [{"speedAccepted": {}}, {"speedRejectedTotal": {}}]
+RIG_EXPECTED_ATTRIBUTES = [
+    {
+        "expectedProfitability": {
+            "numerical": True,
+            "unit": "BTC",
+            "filter": FILTER_PROFITABILITY,
+        }
+    },
+]
+RIG_EXPECTED_ATTRIBUTES_NON_BTC = [
+    {"efficiency": {"numerical": True, "unit": "%"}},
+]
+DEVICE_EXPECTED_ATTRIBUTES = RIG_EXPECTED_ATTRIBUTES
+
+POWER_ATTRIBUTES = [{"powerUsage": {"numerical": True, "unit": "W"}}]
+NET_PROFIT_ATTRIBUTES = [
+    {"electricityCost": {"numerical": True, "unit": "BTC"}},
+    {
+        "netProfitability": {
+            "numerical": True,
+            "unit": "BTC",
+            "filter": FILTER_PROFITABILITY,
+        }
+    },
+]
+
+PAYOUTS_ATTRIBUTES = [
+    {"lastPayout": {"unit": "BTC"}},
+    {"payouts24h": {"unit": "BTC"}},
+    {"payouts7d": {"unit": "BTC"}},
+    {"payouts30d": {"unit": "BTC"}},
+    {"totalPayouts": {"unit": "BTC"}},
+]
+PAYOUTS_ATTRIBUTES_NON_BTC = [{"lastPayoutTime": {"unit": None}}]
+
+RIG_STATS_ATTRIBUTES = [
+    {"speedAccepted": {"filter": FILTER_SPEED}},
+    {"speedRejectedTotal": {"filter": FILTER_SPEED}},
+]
+
+RIG_TRENDS_ATTRIBUTES = [
+    {"speedAcceptedMean": {"metric": "speedAccepted", "filter": FILTER_SPEED}},
+    {"speedRejectedTotalMean": {"metric": "speedRejectedTotal", "filter": FILTER_SPEED}},
+]
+RIG_ANOMALY_ATTRIBUTES = [{"anomalies": {"numerical": True, "unit": None}}]
+DEVICE_TRENDS_ATTRIBUTES = [
+    {"temperatureMean": {"metric": "temperature", "unit": "°C"}},
+    {"powerUsageMean": {"metric": "powerUsage", "unit": "W"}},
+]
 
 
 async def async_setup_entry(
@@ -52,40 +122,114 @@ async def async_setup_entry(
     @callback
     def _update_entities():
         if not hasattr(_update_entities, "dev"):
-            _update_entities.dev = []
-        if not coordinator.last_update_success:
+            _update_entities.dev = hass.data[DOMAIN][config_entry.entry_id][SENSORS]
+        if not coordinator.last_update_success or coordinator.data is None:
             return
+        selection = hass.data[DOMAIN][config_entry.entry_id][SELECTION]
+
+        def _selected(attributes):
+            return [attr for attr in attributes if selection.metric(next(iter(attr)))]
 
         new_dev = []
 
-        for convert in [True, False]:
-            sensor = NiceHashAccountGlobalSensor(
-                coordinator, config_entry, {"totalBalance": {"unit": "BTC"}}, convert
+        if selection.metric("totalBalance"):
+            for convert in selection.variants:
+                sensor = NiceHashAccountGlobalSensor(
+                    coordinator, config_entry, {"totalBalance": {"unit": "BTC"}}, convert
+                )
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+        if selection.metric("fiatRate"):
+            fiat_rate = NiceHashAccountGlobalSensor(
+                coordinator,
+                config_entry,
+                {"fiatRate": {"unit": config_entry.data.get("fiat", "USD")}},
             )
+            if fiat_rate.unique_id not in _update_entities.dev:
+                new_dev.append(fiat_rate)
+                _update_entities.dev.append(fiat_rate.unique_id)
+
+        for attr in _selected(GLOBAL_ATTRIBUTES):
+            for convert in selection.variants:
+                sensor = NiceHashGlobalSensor(coordinator, config_entry, attr, convert)
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+        for attr in _selected(PAYOUTS_ATTRIBUTES):
+            for convert in selection.variants:
+                sensor = NiceHashPayoutSensor(coordinator, config_entry, attr, convert)
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+        for attr in _selected(PAYOUTS_ATTRIBUTES_NON_BTC):
+            sensor = NiceHashPayoutSensor(coordinator, config_entry, attr)
             if sensor.unique_id not in _update_entities.dev:
                 new_dev.append(sensor)
                 _update_entities.dev.append(sensor.unique_id)
-        fiat_rate = NiceHashAccountGlobalSensor(
-            coordinator,
-            config_entry,
-            {"fiatRate": {"unit": config_entry.data.get("fiat", "USD")}},
-        )
-        if fiat_rate.unique_id not in _update_entities.dev:
-            new_dev.append(fiat_rate)
-            _update_entities.dev.append(fiat_rate.unique_id)
 
-        for attr in GLOBAL_ATTRIBUTES:
-            for convert in [True, False]:
-                sensor = NiceHashGlobalSensor(coordinator, config_entry, attr, convert)
+        if selection.metric("minerStatusCount"):
+            for status in MINER_STATUSES:
+                sensor = NiceHashFleetStatusSensor(coordinator, config_entry, status)
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+        for alg in coordinator.data.get(FLEET_OBJ, {}).get("algorithms", {}):
+            for data_type in _selected(RIG_STATS_ATTRIBUTES):
+                sensor = NiceHashFleetAlgorithmSensor(
+                    coordinator, config_entry, alg, data_type
+                )
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+        price = hass.data[DOMAIN][config_entry.entry_id][ELECTRICITY_PRICE]
+        net_profit_attributes = NET_PROFIT_ATTRIBUTES if price.entity_id else []
+
+        for data_type in _selected(POWER_ATTRIBUTES):
+            sensor = NiceHashAccountPowerSensor(
+                coordinator, config_entry, price, data_type
+            )
+            if sensor.unique_id not in _update_entities.dev:
+                new_dev.append(sensor)
+                _update_entities.dev.append(sensor.unique_id)
+
+        for data_type in _selected(net_profit_attributes):
+            for convert in selection.variants:
+                sensor = NiceHashAccountPowerSensor(
+                    coordinator, config_entry, price, data_type, convert
+                )
                 if sensor.unique_id not in _update_entities.dev:
                     new_dev.append(sensor)
                     _update_entities.dev.append(sensor.unique_id)
 
         for rig in coordinator.data.get(RIGS_OBJ).get("miningRigs"):
+            if not selection.rig(rig):
+                continue
             rig_id = rig.get("rigId")
 
-            for data_type in RIG_DATA_ATTRIBUTES:
-                for convert in [True, False]:
+            for data_type in _selected(POWER_ATTRIBUTES):
+                sensor = NiceHashRigPowerSensor(
+                    coordinator, config_entry, price, rig_id, data_type
+                )
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+            for data_type in _selected(net_profit_attributes):
+                for convert in selection.variants:
+                    sensor = NiceHashRigPowerSensor(
+                        coordinator, config_entry, price, rig_id, data_type, convert
+                    )
+                    if sensor.unique_id not in _update_entities.dev:
+                        new_dev.append(sensor)
+                        _update_entities.dev.append(sensor.unique_id)
+
+            for data_type in _selected(RIG_DATA_ATTRIBUTES):
+                for convert in selection.variants:
                     sensor = NiceHashRigSensor(
                         coordinator, config_entry, rig_id, data_type, convert
                     )
@@ -93,15 +237,47 @@ async def async_setup_entry(
                         new_dev.append(sensor)
                         _update_entities.dev.append(sensor.unique_id)
 
-            for data_type in RIG_DATA_ATTRIBUTES_NON_BTC:
+            for data_type in _selected(RIG_DATA_ATTRIBUTES_NON_BTC):
                 sensor = NiceHashRigSensor(coordinator, config_entry, rig_id, data_type)
                 if sensor.unique_id not in _update_entities.dev:
                     new_dev.append(sensor)
                     _update_entities.dev.append(sensor.unique_id)
 
+            for data_type in _selected(RIG_EXPECTED_ATTRIBUTES):
+                for convert in selection.variants:
+                    sensor = NiceHashRigExpectedSensor(
+                        coordinator, config_entry, rig_id, data_type, convert
+                    )
+                    if sensor.unique_id not in _update_entities.dev:
+                        new_dev.append(sensor)
+                        _update_entities.dev.append(sensor.unique_id)
+
+            for data_type in _selected(RIG_EXPECTED_ATTRIBUTES_NON_BTC):
+                sensor = NiceHashRigExpectedSensor(
+                    coordinator, config_entry, rig_id, data_type
+                )
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+            for dev in rig.get("devices", []):
+                for data_type in _selected(DEVICE_EXPECTED_ATTRIBUTES):
+                    for convert in selection.variants:
+                        sensor = NiceHashDeviceExpectedSensor(
+                            coordinator,
+                            config_entry,
+                            rig_id,
+                            dev.get("id"),
+                            data_type,
+                            convert,
+                        )
+                        if sensor.unique_id not in _update_entities.dev:
+                            new_dev.append(sensor)
+                            _update_entities.dev.append(sensor.unique_id)
+
             for stat in rig.get("stats", []):
                 alg = stat.get("algorithm")
-                for data_type in RIG_STATS_ATTRIBUTES:
+                for data_type in _selected(RIG_STATS_ATTRIBUTES):
                     sensor = NiceHashRigStatSensor(
                         coordinator,
                         config_entry,
@@ -112,23 +288,221 @@ async def async_setup_entry(
                     if sensor.unique_id not in _update_entities.dev:
                         new_dev.append(sensor)
                         _update_entities.dev.append(sensor.unique_id)
+                for data_type in _selected(RIG_TRENDS_ATTRIBUTES):
+                    sensor = NiceHashRigTrendSensor(
+                        coordinator,
+                        config_entry,
+                        rig_id,
+                        alg.get("enumName"),
+                        data_type,
+                    )
+                    if sensor.unique_id not in _update_entities.dev:
+                        new_dev.append(sensor)
+                        _update_entities.dev.append(sensor.unique_id)
+
+            for dev in rig.get("devices", []):
+                for data_type in _selected(DEVICE_TRENDS_ATTRIBUTES):
+                    sensor = NiceHashDeviceTrendSensor(
+                        coordinator, config_entry, rig_id, dev.get("id"), data_type
+                    )
+                    if sensor.unique_id not in _update_entities.dev:
+                        new_dev.append(sensor)
+                        _update_entities.dev.append(sensor.unique_id)
+
+            for data_type in _selected(RIG_ANOMALY_ATTRIBUTES):
+                sensor = NiceHashRigAnomalySensor(
+                    coordinator, config_entry, rig_id, data_type
+                )
+                if sensor.unique_id not in _update_entities.dev:
+                    new_dev.append(sensor)
+                    _update_entities.dev.append(sensor.unique_id)
+
+        for sensor in list(new_dev):
+            if sensor.filtered:
+                raw_sensor = NiceHashRawSensor(sensor)
+                new_dev.append(raw_sensor)
+                _update_entities.dev.append(raw_sensor.unique_id)
 
         async_add_entities(new_dev)
 
     unsub = coordinator.async_add_listener(_update_entities)
     hass.data[DOMAIN][config_entry.entry_id][UNSUB].append(unsub)
-    await coordinator.async_refresh()
+    hass.data[DOMAIN][config_entry.entry_id][UNSUB].append(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id), _update_entities
+        )
+    )
+    _update_entities()
 
-    # @callback
-    # def update_sensor_entities(entry: ConfigEntry) -> None:
-    #     _LOGGER.warning("called")
 
-    # hass.data[DOMAIN][entry.entry_id][UNSUB].append(
-    #     async_dispatcher_connect(hass, entry.entry_id, update_sensor_entities)
-    # )
+class NiceHashFilteredSensor(NiceHashCoordinatorEntity, Entity):
+    """Sensor whose state writes go through an optional NiceHashStateFilter.
 
+    Subclasses compute the unfiltered value in raw_state, state only reflects
+    the last value the filter let through.
+    """
 
-class NiceHashGlobalSensor(CoordinatorEntity, Entity):
+    _state_filter = None
+    _stale = False
+    _unsub_trailing_publish = None
+
+    def _setup_state_filter(self, config_entry: ConfigEntry, info) -> None:
+        filter_type = info.get("filter")
+        if filter_type is not None:
+            self._state_filter = NiceHashStateFilter(config_entry, filter_type)
+
+    @property
+    def filtered(self) -> bool:
+        """Return True if the state writes go through a filter."""
+        return self._state_filter is not None
+
+    @property
+    def selection_metric(self):
+        """Return the metric selecting the sensor in the options."""
+        return self._info_type
+
+    def is_selected(self, selection) -> bool:
+        """Return True if the options still select the sensor.
+
+        The currency sensors are also deselected by a change of currency.
+        """
+        if self._info.get("unit") == "BTC" and self._convert not in selection.variants:
+            return False
+        if self._convert and self._fiat != self._config_entry.data["fiat"]:
+            return False
+        return super().is_selected(selection)
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return None
+
+    @property
+    def state(self):
+        """State of the sensor."""
+        if self._state_filter is None or not self._state_filter.published:
+            return self.raw_state
+        return self._state_filter.value
+
+    def _filter_state(self) -> bool:
+        """Feed the current raw state to the filter, True if it must be written."""
+        if self._state_filter is None:
+            return True
+        if not self.available:
+            return self._state_filter.accept(None)
+        scale = 1
+        if self._convert:
+            scale = self.coordinator.data[ACCOUNT_OBJ]["currencies"][0].get(
+                "fiatRate", 0
+            )
+        accepted = self._state_filter.accept(self.raw_state, scale)
+        if accepted:
+            self._async_cancel_trailing_publish()
+        elif (
+            self._state_filter.held_for is not None
+            and self._unsub_trailing_publish is None
+            and self.hass is not None
+        ):
+            self._unsub_trailing_publish = async_call_later(
+                self.hass, self._state_filter.held_for, self._async_trailing_publish
+            )
+        return accepted
+
+    @callback
+    def _async_cancel_trailing_publish(self) -> None:
+        if self._unsub_trailing_publish is not None:
+            self._unsub_trailing_publish()
+            self._unsub_trailing_publish = None
+
+    @callback
+    def _async_trailing_publish(self, _now) -> None:
+        """Publish the latest value once the minimum interval is over."""
+        self._unsub_trailing_publish = None
+        if self._filter_state():
+            self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        return self.coordinator.stale_attributes()
+
+    async def async_added_to_hass(self):
+        """Prime the filter with the initial state."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_trailing_publish)
+        self._filter_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Only write the state when the filter lets the new value through.
+
+        The state is always written while the data is stale, and right after,
+        to keep the data_age attribute current.
+        """
+        stale = not self.coordinator.last_update_success
+        if self._filter_state() or stale or self._stale:
+            self.async_write_ha_state()
+        self._stale = stale
+
+
+class NiceHashRawSensor(NiceHashFilteredSensor):
+    """Unfiltered companion of a filtered sensor, disabled by default.
+
+    Every refresh changing the value is written, so the values the filter of
+    the source sensor holds back are still recorded for the statistics.
+    """
+
+    def __init__(self, source: NiceHashFilteredSensor) -> None:
+        super().__init__(source.coordinator)
+        self._source = source
+        self._config_entry = source._config_entry
+        self._rig_id = source._rig_id
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """Return False, only enabled on demand."""
+        return False
+
+    def is_selected(self, selection) -> bool:
+        """Return True if the options still select the source sensor."""
+        return self._source.is_selected(selection)
+
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the source sensor depends on."""
+        return self._source.listener_channels
+
+    @property
+    def unique_id(self):
+        return f"{self._source.unique_id}-raw"
+
+    @property
+    def name(self):
+        name = self._source.name
+        return f"{name} - raw" if name is not None else None
+
+    @property
+    def device_info(self):
+        """Information about this entity/device."""
+        return self._source.device_info
+
+    @property
+    def unit_of_measurement(self):
+        """Return unit of measurement."""
+        return self._source.unit_of_measurement
+
+    @property
+    def available(self):
+        """Return availability"""
+        return self._source.available
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the source sensor."""
+        return self._source.raw_state
+
+
+class NiceHashGlobalSensor(NiceHashFilteredSensor):
     """Sensor reprensenting all rigs data"""
 
     domain = PLATFORM
@@ -144,15 +518,16 @@ class NiceHashGlobalSensor(CoordinatorEntity, Entity):
         self._convert = convert
         self._config_name = self._config_entry.data["name"]
         self._fiat = self._config_entry.data["fiat"]
+        self._setup_state_filter(config_entry, self._info)
 
-    @property
+    @cached_property
     def unique_id(self):
         unique_id = f"nh-{self._config_name}-{self._info_type}"
         if self._convert:
             return f"{unique_id}-{self._fiat}"
         return unique_id
 
-    @property
+    @cached_property
     def name(self):
         name = f"NH - {self._config_name} - {self._info_type}"
         if self._convert:
@@ -160,8 +535,8 @@ class NiceHashGlobalSensor(CoordinatorEntity, Entity):
         return name
 
     @property
-    def state(self):
-        """State of the sensor."""
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
         if self._convert and self._info.get("unit", None) == "BTC":
             return (
                 float(self.coordinator.data[self._data_type][self._info_type])
@@ -172,16 +547,23 @@ class NiceHashGlobalSensor(CoordinatorEntity, Entity):
     @property
     def available(self):
         """Return availability"""
-        return self.coordinator.last_update_success
+        return self.coordinator.data_available
 
     @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        if self._convert:
+            return [self._data_type, ACCOUNT_OBJ]
+        return [self._data_type]
+
+    @cached_property
     def unit_of_measurement(self):
         """Return unit of measurement."""
         if self._convert and self._info.get("unit", None) == "BTC":
             return self._fiat
         return self._info.get("unit", None)
 
-    @property
+    @cached_property
     def device_info(self):
         """Information about this entity/device."""
         return {
@@ -198,7 +580,7 @@ class NiceHashGlobalSensor(CoordinatorEntity, Entity):
         }
 
 
-class NiceHashSensor(CoordinatorEntity, Entity):
+class NiceHashSensor(NiceHashFilteredSensor):
     """Representation of a NiceHash Sensor"""
 
     domain = PLATFORM
@@ -214,28 +596,32 @@ class NiceHashSensor(CoordinatorEntity, Entity):
         self._config_entry = config_entry
         self._convert = convert
         self._fiat = self._config_entry.data["fiat"]
+        self._setup_state_filter(config_entry, self._info)
 
-    @property
+    @cached_property
     def unit_of_measurement(self):
         """Return unit of measurement."""
         if self._convert and self._info.get("unit", None) == "BTC":
             return self._fiat
         return self._info.get("unit", None)
 
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        if self._convert:
+            return [self._rig_id, ACCOUNT_OBJ]
+        return [self._rig_id]
+
     @property
     def available(self):
         """Return availability"""
-        return self.coordinator.last_update_success and self.get_rig() is not None
+        return self.coordinator.data_available and self.get_rig() is not None
 
     def get_rig(self):
         """Return the rig object."""
-        rig = None
-        for rig_entry in self.coordinator.data[self._data_type].get("miningRigs", []):
-            if rig_entry.get("rigId") == self._rig_id:
-                rig = rig_entry
-        return rig
+        return self.coordinator.get_rig(self._rig_id)
 
-    @property
+    @generation_cached_property
     def device_info(self):
         """Information about this entity/device."""
         rig = self.get_rig()
@@ -252,14 +638,14 @@ class NiceHashSensor(CoordinatorEntity, Entity):
 class NiceHashRigSensor(NiceHashSensor):
     """Sensor representing NiceHash rig data."""
 
-    @property
+    @cached_property
     def unique_id(self):
         unique_id = f"nh-{self._rig_id}-{self._info_type}"
         if self._convert:
             return f"{unique_id}-{self._fiat}"
         return unique_id
 
-    @property
+    @generation_cached_property
     def name(self):
         rig = self.get_rig()
         if rig is not None:
@@ -270,8 +656,8 @@ class NiceHashRigSensor(NiceHashSensor):
         return None
 
     @property
-    def state(self):
-        """State of the sensor."""
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
         if self._convert and self._info.get("unit", None) == "BTC":
             return (
                 self.get_rig()[self._info_type]
@@ -280,21 +666,112 @@ class NiceHashRigSensor(NiceHashSensor):
         return self.get_rig()[self._info_type]
 
 
-class NiceHashRigStatSensor(NiceHashSensor):
-    """Representation of a NiceHash Stat Sensor"""
+class NiceHashRigExpectedSensor(NiceHashRigSensor):
+    """Sensor representing the expected profitability of a rig."""
+
+    def get_expected(self):
+        """Return the expected profitability object of the rig."""
+        return self.coordinator.data.get(EXPECTED_OBJ, {}).get(self._rig_id)
+
+    @property
+    def available(self):
+        """Return availability, not when the rig could not be priced."""
+        expected = self.get_expected()
+        return (
+            super().available
+            and expected is not None
+            and expected[self._info_type] is not None
+        )
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        value = self.get_expected()[self._info_type]
+        if value is not None and self._convert and self._info.get("unit", None) == "BTC":
+            return value * self.coordinator.data[ACCOUNT_OBJ]["currencies"][0].get(
+                "fiatRate", 0
+            )
+        return value
+
+
+class NiceHashDeviceSensor(NiceHashSensor):
+    """Sensor representing NiceHash data of a rig device."""
+
+    def __init__(
+        self, coordinator, config_entry, rigId, deviceId, info_type, convert=False
+    ):
+        super().__init__(coordinator, config_entry, rigId, info_type, convert)
+        self._device_id = deviceId
+
+    @cached_property
+    def unique_id(self):
+        unique_id = f"nh-{self._rig_id}-{self._device_id}-{self._info_type}"
+        if self._convert:
+            return f"{unique_id}-{self._fiat}"
+        return unique_id
+
+    @generation_cached_property
+    def name(self):
+        rig = self.get_rig()
+        device = self.get_device()
+        if rig is not None and device is not None:
+            name = f"NH - {rig.get('name')} - {device.get('name')} - {self._info_type}"
+            if self._convert:
+                return f"{name} - {self._fiat}"
+            return name
+        return None
+
+    def get_device(self):
+        """Return device object."""
+        return self.coordinator.get_device(self._rig_id, self._device_id)
+
+
+class NiceHashDeviceExpectedSensor(NiceHashDeviceSensor):
+    """Sensor representing the expected profitability of a device."""
+
+    def get_expected(self):
+        """Return the expected profitability object of the device."""
+        rig_expected = self.coordinator.data.get(EXPECTED_OBJ, {}).get(self._rig_id)
+        if rig_expected is None:
+            return None
+        return rig_expected["devices"].get(self._device_id)
+
+    @property
+    def available(self):
+        """Return availability, not when the device could not be priced."""
+        expected = self.get_expected()
+        return (
+            super().available
+            and expected is not None
+            and expected[self._info_type] is not None
+        )
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        value = self.get_expected()[self._info_type]
+        if value is not None and self._convert and self._info.get("unit", None) == "BTC":
+            return value * self.coordinator.data[ACCOUNT_OBJ]["currencies"][0].get(
+                "fiatRate", 0
+            )
+        return value
+
+
+class NiceHashRigAlgorithmSensor(NiceHashSensor):
+    """Sensor representing NiceHash data of a rig algorithm."""
 
     def __init__(self, coordinator, config_entry, rigId, alg, info_type, convert=False):
         super().__init__(coordinator, config_entry, rigId, info_type, convert)
         self._alg = alg
 
-    @property
+    @cached_property
     def unique_id(self):
         unique_id = f"nh-{self._rig_id}-{self._alg}-{self._info_type}"
         if self._convert:
             return f"{unique_id}-{self._fiat}"
         return unique_id
 
-    @property
+    @generation_cached_property
     def name(self):
         rig = self.get_rig()
         if rig is not None:
@@ -304,6 +781,21 @@ class NiceHashRigStatSensor(NiceHashSensor):
             return name
         return None
 
+    @property
+    def unit_of_measurement(self):
+        """Return unit of measurement.
+
+        Not cached with the rig data, the algorithms metadata changes apart.
+        """
+        unit = self.coordinator.algorithms.unit(self._alg)
+        if unit:
+            return unit
+        return super().unit_of_measurement
+
+
+class NiceHashRigStatSensor(NiceHashRigAlgorithmSensor):
+    """Representation of a NiceHash Stat Sensor"""
+
     def get_alg(self):
         """Return the stat object."""
         rig = self.get_rig()
@@ -322,8 +814,8 @@ class NiceHashRigStatSensor(NiceHashSensor):
         return alg
 
     @property
-    def state(self):
-        """State of the sensor."""
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
         alg = self.get_alg()
         if alg is not None:
             if self._convert:
@@ -340,12 +832,180 @@ class NiceHashRigStatSensor(NiceHashSensor):
         return super().available and self.get_alg() is not None
 
     @property
+    def extra_state_attributes(self):
+        """Return the state attributes, with the speed in units per second."""
+        attributes = super().extra_state_attributes
+        state = self.state
+        mining_factor = self.coordinator.algorithms.mining_factor(self._alg)
+        if not self._convert and state is not None and mining_factor is not None:
+            attributes = {**attributes, "normalized_speed": state * mining_factor}
+        return attributes
+
+
+class NiceHashTrendSensor(NiceHashSensor):
+    """Sensor representing the rolling mean of a rig series."""
+
+    _precision = 1
+
+    def get_stats(self):
+        """Return the rolling statistics of the series, None without any."""
+        return None
+
+    def get_trends(self):
+        """Return the rolling statistics of the rig."""
+        return self.coordinator.data.get(TRENDS_OBJ, {}).get(self._rig_id)
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and self.get_stats() is not None
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return round(self.get_stats()["mean"], self._precision)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes, with the deviation and anomaly flag."""
+        stats = self.get_stats() or {}
+        return {
+            **super().extra_state_attributes,
+            "stddev": stats.get("stddev"),
+            "zscore": stats.get("zscore"),
+            "anomaly": stats.get("anomaly"),
+        }
+
+
+class NiceHashRigTrendSensor(NiceHashTrendSensor, NiceHashRigAlgorithmSensor):
+    """Sensor representing the rolling mean of a rig algorithm speed"""
+
+    _precision = 2
+
+    def get_stats(self):
+        """Return the rolling statistics of the algorithm speed."""
+        trends = self.get_trends()
+        if trends is None:
+            return None
+        return trends["algorithms"].get(self._alg, {}).get(self._info["metric"])
+
+
+class NiceHashDeviceTrendSensor(NiceHashTrendSensor, NiceHashDeviceSensor):
+    """Sensor representing the rolling mean of a device temperature or power"""
+
+    def get_stats(self):
+        """Return the rolling statistics of the device metric."""
+        trends = self.get_trends()
+        if trends is None:
+            return None
+        return trends["devices"].get(self._device_id, {}).get(self._info["metric"])
+
+
+class NiceHashRigAnomalySensor(NiceHashRigSensor):
+    """Sensor representing the number of anomalous series of a rig"""
+
+    def get_trends(self):
+        """Return the rolling statistics of the rig."""
+        return self.coordinator.data.get(TRENDS_OBJ, {}).get(self._rig_id)
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and self.get_trends() is not None
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return len(self.get_trends()["anomalies"])
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes, with the anomalous series."""
+        trends = self.get_trends() or {}
+        return {
+            **super().extra_state_attributes,
+            "anomalies": trends.get("anomalies", []),
+        }
+
+
+class NiceHashPayoutSensor(NiceHashGlobalSensor):
+    """Sensor representing the mining payouts history"""
+
+    def __init__(
+        self, coordinator, config_entry: ConfigEntry, info_type, convert=False
+    ):
+        super().__init__(coordinator, config_entry, info_type, convert)
+        self._data_type = PAYOUTS_OBJ
+
+    @property
+    def available(self):
+        """Return availability"""
+        return (
+            super().available
+            and self.coordinator.data.get(self._data_type, {}).get(self._info_type)
+            is not None
+        )
+
+
+class NiceHashFleetStatusSensor(NiceHashGlobalSensor):
+    """Sensor representing the number of rigs in a status"""
+
+    selection_metric = "minerStatusCount"
+
+    def __init__(self, coordinator, config_entry: ConfigEntry, status):
+        super().__init__(
+            coordinator, config_entry, {f"rigs{status.title()}": {"unit": "rigs"}}
+        )
+        self._data_type = FLEET_OBJ
+        self._status = status
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and FLEET_OBJ in self.coordinator.data
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return self.coordinator.data[FLEET_OBJ]["statuses"].get(self._status, 0)
+
+
+class NiceHashFleetAlgorithmSensor(NiceHashGlobalSensor):
+    """Sensor representing the speed of all the rigs for an algorithm"""
+
+    def __init__(self, coordinator, config_entry: ConfigEntry, alg, info_type):
+        super().__init__(coordinator, config_entry, info_type)
+        self._data_type = FLEET_OBJ
+        self._alg = alg
+
+    @cached_property
+    def unique_id(self):
+        return f"nh-{self._config_name}-{self._alg}-{self._info_type}"
+
+    @cached_property
+    def name(self):
+        return f"NH - {self._config_name} - {self._alg} - {self._info_type}"
+
+    @generation_cached_property
     def unit_of_measurement(self):
         """Return unit of measurement."""
-        unit = ALGOS_UNITS.get(self._alg, None)
-        if unit:
-            return unit
-        return super().unit_of_measurement
+        return self.coordinator.algorithms.unit(self._alg)
+
+    def get_alg(self):
+        """Return the aggregated speeds of the algorithm."""
+        return self.coordinator.data.get(FLEET_OBJ, {}).get("algorithms", {}).get(
+            self._alg
+        )
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and self.get_alg() is not None
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return self.get_alg()[self._info_type]
 
 
 class NiceHashAccountGlobalSensor(NiceHashGlobalSensor):
@@ -359,7 +1019,7 @@ class NiceHashAccountGlobalSensor(NiceHashGlobalSensor):
         super().__init__(coordinator, config_entry, info_type, convert)
         self._data_type = ACCOUNT_OBJ
 
-    @property
+    @cached_property
     def name(self):
         name = f"NH - {self._config_entry.data['name']} - {self._info_type}"
         if self._convert:
@@ -367,8 +1027,15 @@ class NiceHashAccountGlobalSensor(NiceHashGlobalSensor):
         return name
 
     @property
-    def state(self):
-        """State of the sensor."""
+    def unit_of_measurement(self):
+        """Return unit of measurement, the fiat rate follows the currency."""
+        if self._info_type == "fiatRate":
+            return self._config_entry.data["fiat"]
+        return super().unit_of_measurement
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
         if self._convert:
             return (
                 float(
@@ -379,3 +1046,124 @@ class NiceHashAccountGlobalSensor(NiceHashGlobalSensor):
                 * self.coordinator.data[ACCOUNT_OBJ]["currencies"][0].get("fiatRate",0)
             )
         return self.coordinator.data[self._data_type]["currencies"][0].get(self._info_type,0)
+
+
+class NiceHashPriceListener(NiceHashFilteredSensor):
+    """Sensor also updated when the electricity price changes."""
+
+    _price: NiceHashElectricityPrice = None
+
+    async def async_added_to_hass(self):
+        """Subscribe to the electricity price changes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._price.signal, self._handle_coordinator_update
+            )
+        )
+
+    def is_selected(self, selection) -> bool:
+        """Return True if the options still select the sensor."""
+        if self._info_type != "powerUsage" and not self._price.entity_id:
+            return False
+        return super().is_selected(selection)
+
+    def get_fiat_rate(self):
+        """Return the BTC conversion rate."""
+        return self.coordinator.data[ACCOUNT_OBJ]["currencies"][0].get("fiatRate", 0)
+
+    def get_power_value(self, power, profitability):
+        """Return the value of the info type for this power and profitability."""
+        if self._info_type == "powerUsage":
+            return power
+        value = net_profit(
+            power, profitability, self._price.price, self.get_fiat_rate()
+        )[self._info_type]
+        if value is not None and self._convert:
+            return value * self.get_fiat_rate()
+        return value
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and (
+            self._info_type == "powerUsage" or self._price.price is not None
+        )
+
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on.
+
+        The electricity cost is converted to BTC with the account fiat rate.
+        """
+        if self._info_type == "powerUsage":
+            return super().listener_channels
+        return [*super().listener_channels, ACCOUNT_OBJ]
+
+
+class NiceHashRigPowerSensor(NiceHashPriceListener, NiceHashRigSensor):
+    """Sensor representing the power usage, electricity cost or net profit of a rig."""
+
+    def __init__(
+        self, coordinator, config_entry, price, rigId, info_type, convert=False
+    ):
+        super().__init__(coordinator, config_entry, rigId, info_type, convert)
+        self._price = price
+
+    @property
+    def available(self):
+        """Return availability"""
+        return (
+            super().available
+            and self._rig_id in self.coordinator.data.get(POWER_OBJ, {}).get("rigs", {})
+        )
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return self.get_power_value(
+            self.coordinator.data[POWER_OBJ]["rigs"][self._rig_id],
+            self.get_rig().get("profitability"),
+        )
+
+
+class NiceHashAccountPowerSensor(NiceHashPriceListener, NiceHashGlobalSensor):
+    """Sensor representing the power usage, electricity cost or net profit of all rigs."""
+
+    def __init__(
+        self, coordinator, config_entry: ConfigEntry, price, info_type, convert=False
+    ):
+        super().__init__(coordinator, config_entry, info_type, convert)
+        self._price = price
+
+    @property
+    def available(self):
+        """Return availability"""
+        return super().available and POWER_OBJ in self.coordinator.data
+
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        return [*super().listener_channels, POWER_OBJ, RIGS_OBJ]
+
+    @cached_property
+    def unique_id(self):
+        unique_id = f"nh-{self._config_name}-total-{self._info_type}"
+        if self._convert:
+            return f"{unique_id}-{self._fiat}"
+        return unique_id
+
+    @cached_property
+    def name(self):
+        name = f"NH - {self._config_name} - total - {self._info_type}"
+        if self._convert:
+            return f"{name} - {self._fiat}"
+        return name
+
+    @property
+    def raw_state(self):
+        """Unfiltered state of the sensor."""
+        return self.get_power_value(
+            self.coordinator.data[POWER_OBJ]["total"],
+            self.coordinator.data[RIGS_OBJ].get("totalProfitability"),
+        )
@@ -0,0 +1,106 @@
+"""Services for NiceHash acting on many rigs and devices at once."""
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from custom_components.nicehash.common import NiceHashRequestLimiter
+from custom_components.nicehash.const import (
+    BULK_MAX_CONCURRENT_REQUESTS,
+    BULK_MIN_REQUEST_INTERVAL_SECONDS,
+    DOMAIN,
+    EVENT_BULK_RESULT,
+    SERVICE_BULK_SET_POWER_MODE,
+    SERVICE_BULK_SET_STATUS,
+    SWITCH_ASYNC_UPDATE_AFTER_SECONDS,
+    SWITCHES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BULK_SET_STATUS_SCHEMA = cv.make_entity_service_schema(
+    {vol.Required("status"): cv.boolean}
+)
+BULK_SET_POWER_MODE_SCHEMA = cv.make_entity_service_schema(
+    {vol.Required("power_mode"): cv.string}
+)
+
+
+def _get_switches(hass: HomeAssistant, entity_ids) -> dict:
+    """Return the NiceHash switches matching entity_ids, keyed by entity_id."""
+    switches = {}
+    for entry_data in hass.data[DOMAIN].values():
+        for switch in entry_data.get(SWITCHES, []):
+            if switch.entity_id in entity_ids:
+                switches[switch.entity_id] = switch
+    return switches
+
+
+async def _async_bulk_command(hass: HomeAssistant, call: ServiceCall, command):
+    """Run command on every targeted switch, then refresh the data once."""
+    entity_ids = sorted(await async_extract_entity_ids(hass, call))
+    switches = _get_switches(hass, entity_ids)
+    limiter = NiceHashRequestLimiter(
+        BULK_MAX_CONCURRENT_REQUESTS, BULK_MIN_REQUEST_INTERVAL_SECONDS
+    )
+
+    async def _run(entity_id):
+        switch = switches.get(entity_id)
+        if switch is None:
+            return {"entity_id": entity_id, "success": False, "error": "not found"}
+        try:
+            response = await limiter.run(command(switch))
+        except Exception as err:
+            _LOGGER.error("Failed to run %s on '%s': %s", call.service, entity_id, err)
+            return {"entity_id": entity_id, "success": False, "error": str(err)}
+        if not (response or {}).get("success"):
+            _LOGGER.error(
+                "Failed to run %s on '%s': %s", call.service, entity_id, response
+            )
+            return {
+                "entity_id": entity_id,
+                "success": False,
+                "error": f"API error: {response}",
+            }
+        return {"entity_id": entity_id, "success": True}
+
+    results = await asyncio.gather(*[_run(entity_id) for entity_id in entity_ids])
+    hass.bus.async_fire(
+        EVENT_BULK_RESULT, {"service": call.service, "results": results}
+    )
+
+    if any(result["success"] for result in results):
+        await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
+    for coordinator in {switch.coordinator for switch in switches.values()}:
+        await coordinator.async_request_refresh()
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the NiceHash domain services."""
+
+    async def bulk_set_status(call: ServiceCall) -> None:
+        status = call.data["status"]
+        await _async_bulk_command(
+            hass, call, lambda switch: switch.async_send_status(status)
+        )
+
+    async def bulk_set_power_mode(call: ServiceCall) -> None:
+        power_mode = call.data["power_mode"]
+        await _async_bulk_command(
+            hass, call, lambda switch: switch.set_power_mode(power_mode)
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BULK_SET_STATUS, bulk_set_status, BULK_SET_STATUS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET_POWER_MODE,
+        bulk_set_power_mode,
+        BULK_SET_POWER_MODE_SCHEMA,
+    )
@@ -6,24 +6,38 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import ToggleEntity
 from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv, entity_platform, service
+from homeassistant.helpers.event import async_call_later
 import voluptuous as vol
 
 from homeassistant.exceptions import HomeAssistantError
 
-# from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.typing import HomeAssistantType
 
-from custom_components.nicehash.nicehash import NiceHashPrivateAPI
-from custom_components.nicehash.common import NiceHashSensorDataUpdateCoordinator
+from custom_components.nicehash.nicehash import (
+    NiceHashCommandSuperseded,
+    NiceHashPrivateAPI,
+)
+from custom_components.nicehash.common import (
+    NiceHashCoordinatorEntity,
+    NiceHashSensorDataUpdateCoordinator,
+    cached_property,
+    generation_cached_property,
+    normalize_value,
+)
 from custom_components.nicehash.const import (
     API,
     DOMAIN,
+    FLEET_OBJ,
+    GROUP_SWITCH_UNIQUE_ID,
     RIGS_OBJ,
+    SELECTION,
     SENSOR_DATA_COORDINATOR,
+    SIGNAL_OPTIONS_UPDATED,
     SWITCH_ASYNC_UPDATE_AFTER_SECONDS,
+    SWITCH_OPTIMISTIC_TIMEOUT_SECONDS,
+    SWITCHES,
+    SWITCH_UNIQUE_IDS,
     UNSUB,
     SERVICE_SET_POWER_MODE
 )
@@ -49,24 +63,32 @@ async def async_setup_entry(
     @callback
     def _update_entities():
         if not hasattr(_update_entities, "dev"):
-            _update_entities.dev = []
-        if not coordinator.last_update_success:
+            _update_entities.dev = hass.data[DOMAIN][config_entry.entry_id][
+                SWITCH_UNIQUE_IDS
+            ]
+        if not coordinator.last_update_success or coordinator.data is None:
             return
+        selection = hass.data[DOMAIN][config_entry.entry_id][SELECTION]
 
         new_dev = []
 
         for rig in coordinator.data.get(RIGS_OBJ).get("miningRigs"):
+            if not selection.rig(rig):
+                continue
             rig_id = rig.get("rigId")
-            rig_switch = NiceHashRigSwitch(
-                hass.data[DOMAIN][config_entry.entry_id][API],
-                coordinator,
-                config_entry,
-                rig_id,
-            )
-            if rig_switch.unique_id not in _update_entities.dev:
-                new_dev.append(rig_switch)
-                _update_entities.dev.append(rig_switch.unique_id)
+            if selection.metric("rigPower"):
+                rig_switch = NiceHashRigSwitch(
+                    hass.data[DOMAIN][config_entry.entry_id][API],
+                    coordinator,
+                    config_entry,
+                    rig_id,
+                )
+                if rig_switch.unique_id not in _update_entities.dev:
+                    new_dev.append(rig_switch)
+                    _update_entities.dev.append(rig_switch.unique_id)
 
+            if not selection.metric("devicePower"):
+                continue
             for dev in rig.get("devices"):
                 device_id = dev.get("id")
                 device_switch = NiceHashDeviceSwitch(
@@ -80,17 +102,138 @@ async def async_setup_entry(
                     new_dev.append(device_switch)
                     _update_entities.dev.append(device_switch.unique_id)
 
+        for group in coordinator.data.get(FLEET_OBJ, {}).get("groups", {}):
+            if not selection.metric("groupPower") or not selection.group(group):
+                continue
+            group_switch = NiceHashGroupSwitch(
+                hass.data[DOMAIN][config_entry.entry_id][API],
+                coordinator,
+                config_entry,
+                group,
+            )
+            if group_switch.unique_id not in _update_entities.dev:
+                new_dev.append(group_switch)
+                _update_entities.dev.append(group_switch.unique_id)
+
+        hass.data[DOMAIN][config_entry.entry_id][SWITCHES].extend(new_dev)
         async_add_entities(new_dev)
 
     unsub = coordinator.async_add_listener(_update_entities)
     hass.data[DOMAIN][config_entry.entry_id][UNSUB].append(unsub)
-    await coordinator.async_refresh()
+    hass.data[DOMAIN][config_entry.entry_id][UNSUB].append(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id), _update_entities
+        )
+    )
+    _update_entities()
+
 
+class NiceHashOptimisticSwitch:
+    """Switch reporting the commanded state until the rig data converges.
 
-class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
+    Once a status command is acknowledged the switch is on or off as
+    commanded, with the pending attribute set. The optimistic state is
+    dropped when the rig data reports the same state, or after
+    SWITCH_OPTIMISTIC_TIMEOUT_SECONDS when it never did.
+    """
+
+    _optimistic = None
+    _unsub_optimistic_timeout = None
+
+    @property
+    def reported_is_on(self):
+        """Return true if the rig data reports the switch on."""
+        return False
+
+    @property
+    def is_on(self):
+        """Return true if switch is on."""
+        if self._optimistic is not None:
+            return self._optimistic
+        return self.reported_is_on
+
+    @property
+    def pending(self):
+        """Return true while the commanded state is not reported yet."""
+        return self._optimistic is not None
+
+    async def async_added_to_hass(self):
+        """Cancel the optimistic state timeout on removal."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_clear_optimistic)
+
+    @callback
+    def _async_set_optimistic(self, status: bool) -> None:
+        was_pending = self.pending
+        self._async_clear_optimistic()
+        if self.reported_is_on == status:
+            # A command reversed before the rig data converged
+            if was_pending:
+                self.async_write_ha_state()
+            return
+        self._optimistic = status
+        self._unsub_optimistic_timeout = async_call_later(
+            self.hass, SWITCH_OPTIMISTIC_TIMEOUT_SECONDS, self._async_optimistic_timeout
+        )
+        self.async_write_ha_state()
+
+    @callback
+    def _async_clear_optimistic(self) -> None:
+        self._optimistic = None
+        if self._unsub_optimistic_timeout is not None:
+            self._unsub_optimistic_timeout()
+            self._unsub_optimistic_timeout = None
+
+    @callback
+    def _async_optimistic_timeout(self, _now) -> None:
+        self._unsub_optimistic_timeout = None
+        _LOGGER.warning(
+            "'%s' was not reported %s after %s seconds, reverting its state",
+            self.entity_id,
+            "on" if self._optimistic else "off",
+            SWITCH_OPTIMISTIC_TIMEOUT_SECONDS,
+        )
+        self._async_clear_optimistic()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Drop the optimistic state once the rig data converged."""
+        if self._optimistic is not None and self.reported_is_on == self._optimistic:
+            self._async_clear_optimistic()
+        super()._handle_coordinator_update()
+
+    async def _async_set_status(self, status: bool):
+        # A command for the same state is still converging
+        if self._optimistic == status:
+            return
+        try:
+            await self.async_send_status(status)
+            await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
+        except NiceHashCommandSuperseded as err:
+            # The newer command sets the state
+            _LOGGER.debug("Status command of '%s' dropped: %s", self.entity_id, err)
+            return
+        except Exception as err:
+            _LOGGER.error("Failed to set the status of '%s': %s", self.entity_id, err)
+        await self.coordinator.async_request_refresh()
+
+    async def async_turn_on(self, **kwargs):
+        """Turn the switch on."""
+        await self._async_set_status(True)
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the switch off."""
+        await self._async_set_status(False)
+
+
+class NiceHashRigSwitch(
+    NiceHashOptimisticSwitch, NiceHashCoordinatorEntity, ToggleEntity
+):
     """Class describing a rig switch"""
 
     DOMAIN = PLATFORM
+    selection_metric = "rigPower"
 
     def __init__(
         self, api: NiceHashPrivateAPI, coordinator, config_entry, rigId
@@ -101,12 +244,17 @@ class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
         self._data_type = RIGS_OBJ
         self._api = api
 
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        return [self._rig_id]
+
     @property
     def available(self):
         """Return availability"""
         rig = self.get_rig()
         return (
-            self.coordinator.last_update_success
+            self.coordinator.data_available
             and rig is not None
             and rig.get("minerStatus", "UNKNOWN")
             not in ["DISABLED", "TRANSFERED", "UNKNOWN", "OFFLINE"]
@@ -114,13 +262,9 @@ class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
 
     def get_rig(self):
         """Return the rig object."""
-        rig = None
-        for rig_entry in self.coordinator.data[self._data_type].get("miningRigs", []):
-            if rig_entry.get("rigId") == self._rig_id:
-                rig = rig_entry
-        return rig
+        return self.coordinator.get_rig(self._rig_id)
 
-    @property
+    @generation_cached_property
     def name(self):
         rig = self.get_rig()
         if rig is not None:
@@ -128,12 +272,12 @@ class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
             return name
         return None
 
-    @property
+    @cached_property
     def unique_id(self):
         unique_id = f"nh-{self._rig_id}-power"
         return unique_id
 
-    @property
+    @generation_cached_property
     def device_info(self):
         """Information about this entity/device."""
         rig = self.get_rig()
@@ -147,8 +291,17 @@ class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
         }
 
     @property
-    def is_on(self):
-        """Return true if switch is on."""
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        return {
+            "pending_commands": self._api.commands.depth(self._rig_id),
+            "pending": self.pending,
+            **self.coordinator.stale_attributes(),
+        }
+
+    @property
+    def reported_is_on(self):
+        """Return true if the rig data reports the rig on."""
         rig = self.get_rig()
         if rig is not None:
             status = rig.get("minerStatus", "UNKNOWN")
@@ -156,33 +309,141 @@ class NiceHashRigSwitch(CoordinatorEntity, ToggleEntity):
                 return True
         return False
 
-    async def async_turn_on(self, **kwargs):
-        """Turn the switch on."""
-        try:
-            await self._api.set_rig_status(self._rig_id, True)
-            await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
-        except Exception as err:
-            _LOGGER.error("Failed to set the status of '%s': %s", self.entity_id, err)
-        await self.coordinator.async_request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Turn the switch off."""
-        try:
-            await self._api.set_rig_status(self._rig_id, False)
-            await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
-        except Exception as err:
-            _LOGGER.error("Failed to set the status of '%s': %s", self.entity_id, err)
-        await self.coordinator.async_request_refresh()
+    async def async_send_status(self, status: bool):
+        """Send the status command without refreshing the data."""
+        result = await self._api.set_rig_status(self._rig_id, status)
+        if not result.get("success"):
+            raise HomeAssistantError(f"API error: {result}")
+        self._async_set_optimistic(status)
+        return result
 
     async def set_power_mode(self, power_mode):
         # Not implemented for RigSwitch
         raise HomeAssistantError("Rig PowerMode service not supported")
 
 
-class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
+class NiceHashGroupSwitch(
+    NiceHashOptimisticSwitch, NiceHashCoordinatorEntity, ToggleEntity
+):
+    """Class describing the switch of all the rigs of a NiceHash group
+
+    The commands target the group, a single request acts on all its rigs.
+    """
+
+    DOMAIN = PLATFORM
+    selection_metric = "groupPower"
+
+    def __init__(
+        self, api: NiceHashPrivateAPI, coordinator, config_entry, group
+    ) -> None:
+        super().__init__(coordinator)
+        self._group = group
+        self._config_entry = config_entry
+        self._config_name = config_entry.data["name"]
+        self._data_type = FLEET_OBJ
+        self._api = api
+
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on.
+
+        The group aggregates count the rigs per status.
+        """
+        return [FLEET_OBJ]
+
+    def get_group(self):
+        """Return the group object."""
+        return self.coordinator.data.get(FLEET_OBJ, {}).get("groups", {}).get(
+            self._group
+        )
+
+    def is_selected(self, selection) -> bool:
+        """Return True if the options still select the switch."""
+        return selection.group(self._group) and super().is_selected(selection)
+
+    @property
+    def available(self):
+        """Return availability"""
+        return self.coordinator.data_available and self.get_group() is not None
+
+    @cached_property
+    def name(self):
+        return f"NH - {self._config_name} - {self._group} - Power"
+
+    @cached_property
+    def unique_id(self):
+        return GROUP_SWITCH_UNIQUE_ID.format(self._config_name, self._group)
+
+    @cached_property
+    def device_info(self):
+        """Information about this entity/device."""
+        return {
+            "identifiers": {
+                (
+                    DOMAIN,
+                    f"{self._config_entry.entry_id}_{self._config_name}",
+                )
+            },
+            "name": f"{self._config_name} Account",
+            "sw_version": "",
+            "model": "",
+            "manufacturer": "NiceHash",
+        }
+
+    def _rigs_on(self, group):
+        return sum(
+            count
+            for status, count in group["statuses"].items()
+            if status in ["BENCHMARKING", "MINING"]
+        )
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        group = self.get_group() or {"rigs": [], "statuses": {}}
+        return {
+            "rigs": len(group["rigs"]),
+            "rigs_on": self._rigs_on(group),
+            "pending_commands": self._api.commands.depth(f"group:{self._group}"),
+            "pending": self.pending,
+            **self.coordinator.stale_attributes(),
+        }
+
+    @property
+    def reported_is_on(self):
+        """Return true if the rig data reports a rig of the group on."""
+        group = self.get_group()
+        return group is not None and self._rigs_on(group) > 0
+
+    async def async_send_status(self, status: bool):
+        """Send the status command without refreshing the data."""
+        result = await self._api.set_group_status(self._group, status)
+        if not result.get("success"):
+            raise HomeAssistantError(f"API error: {result}")
+        self._async_set_optimistic(status)
+        return result
+
+    async def set_power_mode(self, power_mode):
+        """Set the power mode of all the devices of the group"""
+        power_mode = power_mode.upper()
+        if power_mode not in ["HIGH", "MEDIUM", "LOW"]:
+            raise HomeAssistantError(
+                f"Power mode [{power_mode}] not supported for a group. "
+                "Supported power modes are HIGH, MEDIUM, LOW"
+            )
+        response = await self._api.set_group_power_mode(self._group, power_mode)
+        if not response.get("success"):
+            raise HomeAssistantError(f"API error: {response}")
+        return response
+
+
+class NiceHashDeviceSwitch(
+    NiceHashOptimisticSwitch, NiceHashCoordinatorEntity, ToggleEntity
+):
     """Class describing a device switch"""
 
     DOMAIN = PLATFORM
+    selection_metric = "devicePower"
 
     def __init__(
             self, api: NiceHashPrivateAPI, coordinator, config_entry, rigId, deviceId
@@ -194,12 +455,17 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
         self._data_type = RIGS_OBJ
         self._api = api
 
+    @property
+    def listener_channels(self):
+        """Return the coordinator channels the entity depends on."""
+        return [self._rig_id]
+
     @property
     def available(self):
         """Return availability"""
         device = self.get_device()
         return (
-                self.coordinator.last_update_success
+                self.coordinator.data_available
                 and device is not None
                 and device.get("status", {}).get("enumName", "UNKNOWN")
                 not in ["TRANSFERED", "UNKNOWN", "OFFLINE"]
@@ -207,22 +473,13 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
 
     def get_rig(self):
         """Return the rig object."""
-        rig = None
-        for rig_entry in self.coordinator.data[self._data_type].get("miningRigs", []):
-            if rig_entry.get("rigId") == self._rig_id:
-                rig = rig_entry
-        return rig
+        return self.coordinator.get_rig(self._rig_id)
 
     def get_device(self):
         """Return device object."""
+        return self.coordinator.get_device(self._rig_id, self._device_id)
 
-        for rig_entry in self.coordinator.data[self._data_type].get("miningRigs", []):
-            if rig_entry.get("rigId") == self._rig_id:
-                for device_entry in rig_entry.get("devices"):
-                    if device_entry.get("id") == self._device_id:
-                        return device_entry
-
-    @property
+    @generation_cached_property
     def name(self):
         rig = self.get_rig()
         device = self.get_device()
@@ -231,12 +488,12 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
             return name
         return None
 
-    @property
+    @cached_property
     def unique_id(self):
         unique_id = f"nh-{self._rig_id}-{self._device_id}-power"
         return unique_id
 
-    @property
+    @generation_cached_property
     def device_info(self):
         """Information about this entity/device."""
         rig = self.get_rig()
@@ -277,11 +534,14 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
             "power_usage": device.get("powerUsage"),
             "power_mode": power_mode,
             "supported_power_modes": ", ".join(supported_power_modes),
+            "pending_commands": self._api.commands.depth(self._rig_id),
+            "pending": self.pending,
+            **self.coordinator.stale_attributes(),
         }
 
     @property
-    def is_on(self):
-        """Return true if switch is on."""
+    def reported_is_on(self):
+        """Return true if the rig data reports the device on."""
         device = self.get_device()
         if device is not None:
             status = device.get("status", {}).get("enumName", "UNKNOWN")
@@ -289,23 +549,15 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
                 return True
         return False
 
-    async def async_turn_on(self, **kwargs):
-        """Turn the switch on."""
-        try:
-            await self._api.set_device_status(self._rig_id, self._device_id, True)
-            await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
-        except Exception as err:
-            _LOGGER.error("Failed to set the status of '%s': %s", self.entity_id, err)
-        await self.coordinator.async_request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Turn the switch off."""
-        try:
-            await self._api.set_device_status(self._rig_id, self._device_id, False)
-            await asyncio.sleep(SWITCH_ASYNC_UPDATE_AFTER_SECONDS)
-        except Exception as err:
-            _LOGGER.error("Failed to set the status of '%s': %s", self.entity_id, err)
-        await self.coordinator.async_request_refresh()
+    async def async_send_status(self, status: bool):
+        """Send the status command without refreshing the data."""
+        result = await self._api.set_device_status(
+            self._rig_id, self._device_id, status
+        )
+        if not result.get("success"):
+            raise HomeAssistantError(f"API error: {result}")
+        self._async_set_optimistic(status)
+        return result
 
     async def set_power_mode(self, power_mode):
         """Set a device power mode"""
@@ -349,6 +601,7 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
             response = await self._api.set_power_mode(rig_id, device_id, power_mode)
         if not response.get("success"):
             raise HomeAssistantError(f"API error: {response}")
+        return response
 
     @staticmethod
     def parse_nhqm_string(nhqm: str) -> dict:
@@ -375,6 +628,4 @@ class NiceHashDeviceSwitch(CoordinatorEntity, ToggleEntity):
 
     @staticmethod
     def normalize_value(value: int) -> int:
-        if 0 >= value <= 500:
-            return value
-        return value % 65536
+        return normalize_value(value)
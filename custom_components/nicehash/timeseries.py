@@ -0,0 +1,149 @@
+"""Rolling statistics and anomaly flags of the recent rig and device samples."""
+from array import array
+from math import isclose, sqrt
+from typing import Any, Dict
+
+from custom_components.nicehash.const import (
+    TRENDS_ANOMALY_ZSCORE,
+    TRENDS_MIN_SAMPLES,
+    TRENDS_WINDOW_SIZE,
+)
+
+ALGORITHM_METRICS = ["speedAccepted", "speedRejectedTotal"]
+DEVICE_METRICS = ["temperature", "powerUsage"]
+
+
+class NiceHashRingBuffer:
+    """Fixed size window of samples with O(1) rolling mean and deviation.
+
+    The sums are updated with each sample added and evicted, and computed
+    again from the window once per full turn so that rounding errors do not
+    build up.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize."""
+        self._samples = array("d", [0.0] * size)
+        self._size = size
+        self._index = 0
+        self.count = 0
+        self._sum = 0.0
+        self._sum_squares = 0.0
+
+    def append(self, value: float) -> None:
+        """Add a sample, evicting the oldest one once the window is full."""
+        if self.count == self._size:
+            evicted = self._samples[self._index]
+            self._sum -= evicted
+            self._sum_squares -= evicted * evicted
+        else:
+            self.count += 1
+        self._samples[self._index] = value
+        self._sum += value
+        self._sum_squares += value * value
+        self._index = (self._index + 1) % self._size
+        if self._index == 0:
+            self._sum = sum(self._samples)
+            self._sum_squares = sum(sample * sample for sample in self._samples)
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the window."""
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """Return the population standard deviation of the window."""
+        if not self.count:
+            return 0.0
+        mean = self.mean
+        return sqrt(max(self._sum_squares / self.count - mean * mean, 0.0))
+
+
+class NiceHashTrends:
+    """Ring buffers of the rig algorithm speeds and device temperature and power.
+
+    A sample further than TRENDS_ANOMALY_ZSCORE standard deviations from the
+    mean of the samples before it is an anomaly, once TRENDS_MIN_SAMPLES
+    samples were collected. Any sample differing from a window without
+    deviation is one too, its z-score is left empty.
+    """
+
+    def __init__(self, size: int = TRENDS_WINDOW_SIZE) -> None:
+        """Initialize."""
+        self._size = size
+        # (rig id, "algorithms" or "devices", algorithm or device id, metric)
+        self._buffers = {}
+
+    def _add(self, key, value) -> Dict[str, Any]:
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = NiceHashRingBuffer(self._size)
+        zscore = None
+        anomaly = False
+        if buffer.count >= TRENDS_MIN_SAMPLES:
+            stddev = buffer.stddev
+            if stddev:
+                zscore = round((value - buffer.mean) / stddev, 2)
+                anomaly = abs(zscore) > TRENDS_ANOMALY_ZSCORE
+            else:
+                # Any change from a flat window, e.g. the first rejects, has
+                # an infinite z-score
+                anomaly = not isclose(value, buffer.mean, rel_tol=1e-9, abs_tol=1e-9)
+        buffer.append(value)
+        return {
+            "mean": buffer.mean,
+            "stddev": buffer.stddev,
+            "zscore": zscore,
+            "anomaly": anomaly,
+        }
+
+    def update(self, rigs) -> Dict[str, Any]:
+        """Add the samples of a refresh and return the statistics per rig.
+
+        The buffers of the rigs, algorithms and devices gone are dropped.
+        """
+        trends = {}
+        keys = set()
+        for rig in rigs.get("miningRigs", []):
+            rig_id = rig.get("rigId")
+            rig_trends = {"algorithms": {}, "devices": {}, "anomalies": []}
+            series = []
+            for stat in rig.get("stats", []):
+                alg = (stat.get("algorithm") or {}).get("enumName")
+                if alg is not None:
+                    series.append(("algorithms", alg, alg, stat, ALGORITHM_METRICS))
+            for device in rig.get("devices", []):
+                series.append(
+                    (
+                        "devices",
+                        device.get("id"),
+                        device.get("name"),
+                        device,
+                        DEVICE_METRICS,
+                    )
+                )
+
+            for kind, name, label, values, metrics in series:
+                for metric in metrics:
+                    value = values.get(metric)
+                    if value is None:
+                        continue
+                    value = float(value)
+                    if metric == "powerUsage" and value < 0:
+                        # -1 when the power usage is unknown
+                        continue
+                    if metric == "temperature" and value > 0:
+                        # NiceHash packs flags in the high bits
+                        value = value % 65536
+                    key = (rig_id, kind, name, metric)
+                    keys.add(key)
+                    stats = self._add(key, value)
+                    rig_trends[kind].setdefault(name, {})[metric] = stats
+                    if stats["anomaly"]:
+                        rig_trends["anomalies"].append(f"{label} {metric}")
+            trends[rig_id] = rig_trends
+
+        for key in set(self._buffers) - keys:
+            del self._buffers[key]
+        return trends
@@ -0,0 +1,67 @@
+"""Status transition events of the rigs and devices."""
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from custom_components.nicehash.common import NiceHashSensorDataUpdateCoordinator
+from custom_components.nicehash.const import EVENT_STATUS_CHANGED, RIGS_OBJ
+
+
+class NiceHashStatusTracker:
+    """Fire an event when the status of a rig or a device changes.
+
+    The minerStatus of the rigs and the status of the devices are compared
+    between consecutive refreshes. The first status seen, or seen again after
+    the rig or device was missing, fires nothing. The duration of a status is
+    counted from the refresh that first saw it, so the one of the first status
+    seen is only the time since it was first seen.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: NiceHashSensorDataUpdateCoordinator
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._coordinator = coordinator
+        # (rig id, device id or None) -> (status, time it was first seen)
+        self._statuses = {}
+
+    @callback
+    def async_track(self) -> None:
+        """Compare the statuses with the previous refresh."""
+        if not self._coordinator.last_update_success or self._coordinator.data is None:
+            return
+
+        now = dt_util.utcnow()
+        statuses = {}
+        for rig in self._coordinator.data[RIGS_OBJ].get("miningRigs", []):
+            self._compare(statuses, now, rig, None, rig.get("minerStatus"))
+            for device in rig.get("devices", []):
+                self._compare(
+                    statuses,
+                    now,
+                    rig,
+                    device,
+                    (device.get("status") or {}).get("enumName"),
+                )
+        self._statuses = statuses
+
+    def _compare(self, statuses, now, rig, device, status) -> None:
+        key = (rig.get("rigId"), device.get("id") if device else None)
+        previous = self._statuses.get(key)
+        if previous is None or previous[0] == status:
+            statuses[key] = previous or (status, now)
+            return
+
+        statuses[key] = (status, now)
+        self._hass.bus.async_fire(
+            EVENT_STATUS_CHANGED,
+            {
+                "rig_id": rig.get("rigId"),
+                "rig_name": rig.get("name"),
+                "device_id": device.get("id") if device else None,
+                "device_name": device.get("name") if device else None,
+                "old": previous[0],
+                "new": status,
+                "duration": int((now - previous[1]).total_seconds()),
+            },
+        )